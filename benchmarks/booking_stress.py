@@ -0,0 +1,93 @@
+# benchmarks/booking_stress.py
+# many processes race to book one ticket type on a shared SQLite file;
+# checks that nothing is oversold and reports bookings per second
+#
+#   python benchmarks/booking_stress.py --workers 8 --quota 500
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from website import create_app, db
+from website.models import User, Event, TicketType, Booking
+
+
+def make_app(path):
+    return create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+
+
+def setup(path, quota):
+    app = make_app(path)
+    with app.app_context():
+        user = User(first_name="Load", email="load@example.com", password_hash="x")
+        event = Event(title="Stress Test", description="-", event_date=date(2030, 1, 1), status="Open")
+        db.session.add_all([user, event])
+        db.session.flush()
+        ticket = TicketType(event_id=event.event_id, label="GA", price=10.0, quota=quota)
+        db.session.add(ticket)
+        db.session.commit()
+        return user.user_id, ticket.ticket_type_id
+
+
+def worker(path, user_id, ticket_type_id, results):
+    from website.booking import book_tickets, NotEnoughTickets
+    app = make_app(path)
+    ok = rejected = 0
+    with app.app_context():
+        while True:
+            try:
+                book_tickets(user_id, ticket_type_id, random.randint(1, 4))
+                ok += 1
+            except NotEnoughTickets:
+                rejected += 1
+                # a small booking may still fit; stop once nothing is left at all
+                if db.session.get(TicketType, ticket_type_id).remaining == 0:
+                    break
+                db.session.rollback()
+    results.put((ok, rejected))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--quota", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stress.db")
+        user_id, ticket_type_id = setup(path, args.quota)
+
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=worker, args=(path, user_id, ticket_type_id, results))
+                 for _ in range(args.workers)]
+        t0 = time.perf_counter()
+        for p in procs:
+            p.start()
+        outcomes = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - t0
+
+        app = make_app(path)
+        with app.app_context():
+            sold = db.session.scalar(db.select(db.func.sum(Booking.quantity))) or 0
+            ticket = db.session.get(TicketType, ticket_type_id)
+            status = db.session.get(Event, ticket.event_id).status
+
+        bookings = sum(ok for ok, _ in outcomes)
+        print(f"{args.workers} workers, quota {args.quota}: {bookings} bookings, {sold} tickets sold, "
+              f"remaining {ticket.remaining}, event status '{status}'")
+        print(f"{bookings / elapsed:.0f} bookings/s over {elapsed:.2f}s")
+        if sold > args.quota or sold + ticket.remaining != args.quota:
+            sys.exit("OVERSOLD")
+        print("no oversell")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bulk_import.py
+# generates a JSON Lines catalogue and times `flask events import` / `export` on it
+#
+#   python benchmarks/bulk_import.py --events 1000000
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from website import create_app, db
+from website.bulk import read_jsonl, import_events, export_jsonl
+from website.models import Event, TicketType
+
+GENRES = ["Hip Hop", "R&B", "Jazz", "Rap", "Electronic", "Comedy", "Indie", "Classical"]
+
+
+def write_catalogue(path, count):
+    start = date(2026, 1, 1)
+    with open(path, 'w') as f:
+        for i in range(count):
+            f.write(json.dumps({
+                "external_ref": f"ext-{i}",
+                "title": f"Event {i}",
+                "description": "Imported event",
+                "genre": random.choice(GENRES),
+                "location": f"Venue {i % 1000}",
+                "event_date": (start + timedelta(days=i % 700)).isoformat(),
+                "start_time": "19:00",
+                "ticket_types": [
+                    {"label": "GA", "price": 40.0, "quota": 500},
+                    {"label": "VIP", "price": 120.0, "quota": 50},
+                ],
+            }) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalogue = os.path.join(tmp, "events.jsonl")
+        write_catalogue(catalogue, args.events)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bulk.db')}",
+                          "DB_PROFILE": "production"})
+        with app.app_context():
+            for label in ("import", "re-import"):
+                t0 = time.perf_counter()
+                with open(catalogue) as f:
+                    totals = import_events(read_jsonl(f), args.batch_size)
+                elapsed = time.perf_counter() - t0
+                print(f"{label:10} {totals['events']} events in {elapsed:.1f}s "
+                      f"({totals['events'] / elapsed:.0f} events/s)")
+
+            events = db.session.scalar(db.select(db.func.count(Event.event_id)))
+            tickets = db.session.scalar(db.select(db.func.count(TicketType.ticket_type_id)))
+            print(f"rows: {events} events, {tickets} ticket types")
+
+            t0 = time.perf_counter()
+            with open(os.path.join(tmp, "out.jsonl"), "w") as out:
+                count = export_jsonl(out)
+            print(f"export     {count} events in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/datagen.py
+# seeded synthetic data with realistic skew: a few events draw most bookings and
+# comments, and a few heavy users make most bookings
+#
+#   python benchmarks/datagen.py --events 20000 --bookings 200000 sqlite:////tmp/load.db
+import argparse
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from website import db
+from website.models import User, Event, TicketType, Booking, Comment
+
+GENRES = ["Hip Hop", "R&B", "Jazz", "Rap", "Electronic", "Comedy", "Rock and Roll",
+          "Alt Rock", "Country", "Indie", "Heavy Metal", "Classical"]
+CITIES = ["Brisbane", "Sydney", "Melbourne", "Perth", "Adelaide", "Hobart", "Darwin", "Canberra"]
+WORDS = ("live night tour acoustic session orchestra showcase summer winter arena club "
+         "rooftop festival unplugged reunion farewell debut anniversary").split()
+TICKETS = [("Standard", 45.0, 2000), ("VIP", 150.0, 200), ("Student", 30.0, 500)]
+PASSWORD = "password"
+
+DEFAULTS = {"users": 2000, "events": 5000, "bookings": 50_000, "comments": 20_000}
+
+
+def zipf_weights(n, s=1.1):
+    # cumulative weights for rank-based skew: item k is picked ~ 1 / k**s as often
+    return list(accumulate(1 / (k ** s) for k in range(1, n + 1)))
+
+
+def generate(users=2000, events=5000, bookings=50_000, comments=20_000, seed=207, batch=10_000):
+    rng = random.Random(seed)
+    today = date.today()
+    password_hash = generate_password_hash(PASSWORD)
+
+    def insert(model, rows):
+        for i in range(0, len(rows), batch):
+            db.session.execute(db.insert(model), rows[i:i + batch])
+
+    insert(User, [{"user_id": u, "first_name": f"User{u}", "last_name": "Load",
+                   "email": f"user{u}@example.com", "password_hash": password_hash}
+                  for u in range(1, users + 1)])
+
+    event_rows, ticket_rows = [], []
+    for e in range(1, events + 1):
+        event_rows.append({
+            "event_id": e,
+            "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {e}",
+            "description": " ".join(rng.choices(WORDS, k=60)),
+            "genre": rng.choice(GENRES),
+            "location": f"Venue {rng.randint(1, 300)}, {rng.choice(CITIES)}",
+            "event_date": today + timedelta(days=rng.randint(-180, 365)),
+            "img": "default.jpeg",
+            "status": "Open",
+            "created_by": rng.randint(1, users),
+        })
+        for label, price, quota in TICKETS[:rng.randint(1, len(TICKETS))]:
+            ticket_rows.append({"ticket_type_id": len(ticket_rows) + 1, "event_id": e,
+                                "label": label, "price": price, "quota": quota, "remaining": quota})
+    insert(Event, event_rows)
+
+    # popular events and heavy users: shuffle ids so popularity is not tied to id order
+    by_event = {}
+    for t in ticket_rows:
+        by_event.setdefault(t["event_id"], []).append(t)
+    event_rank = list(range(1, events + 1))
+    user_rank = list(range(1, users + 1))
+    rng.shuffle(event_rank)
+    rng.shuffle(user_rank)
+    event_weights = zipf_weights(events)
+    user_weights = zipf_weights(users)
+
+    start = datetime.now() - timedelta(days=180)
+    booking_rows = []
+    for b in range(1, bookings + 1):
+        ticket = rng.choice(by_event[rng.choices(event_rank, cum_weights=event_weights)[0]])
+        quantity = min(rng.randint(1, 4), ticket["remaining"])
+        if not quantity:
+            continue
+        ticket["remaining"] -= quantity
+        booking_rows.append({"booking_id": b, "user_id": rng.choices(user_rank, cum_weights=user_weights)[0],
+                             "ticket_type_id": ticket["ticket_type_id"], "quantity": quantity,
+                             "booked_at": start + timedelta(seconds=rng.randint(0, 180 * 86400))})
+    insert(TicketType, ticket_rows)
+    insert(Booking, booking_rows)
+
+    insert(Comment, [{"comment_id": c, "content": " ".join(rng.choices(WORDS, k=12)),
+                      "user_id": rng.randint(1, users),
+                      "event_id": rng.choices(event_rank, cum_weights=event_weights)[0],
+                      "posted_at": start + timedelta(seconds=rng.randint(0, 180 * 86400))}
+                     for c in range(1, comments + 1)])
+    db.session.commit()
+
+    # the derived tables production keeps up to date: sales rollup, venues, then the
+    # carousel feeds (rebuild_feeds commits the venue links too)
+    from website.sales import rebuild_sales
+    from website.venues import link_venues
+    from website.feeds import rebuild_feeds
+    rebuild_sales()
+    link_venues()
+    rebuild_feeds()
+    return {"popular_event": event_rank[0], "heavy_user": user_rank[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("database_uri")
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f"--{name}", type=int, default=default)
+    parser.add_argument("--seed", type=int, default=207)
+    args = parser.parse_args()
+
+    from website import create_app
+    app = create_app({"SQLALCHEMY_DATABASE_URI": args.database_uri})
+    with app.app_context():
+        hot = generate(args.users, args.events, args.bookings, args.comments, args.seed)
+    print(f"generated; most popular event {hot['popular_event']}, heaviest user {hot['heavy_user']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/db_profiles.py
+# mixed read/booking load from several processes against one SQLite file,
+# once per database profile, to compare throughput and lock errors
+#
+#   python benchmarks/db_profiles.py --workers 8 --seconds 5
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+from website import create_app, db
+from website.database import PROFILES
+from website.models import User, Event, TicketType
+
+WRITE_RATIO = 0.2
+
+
+def make_app(path, profile):
+    return create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "DB_PROFILE": profile})
+
+
+def setup(path, profile):
+    app = make_app(path, profile)
+    with app.app_context():
+        user = User(first_name="Load", email="load@example.com", password_hash="x")
+        event = Event(title="Load Test", description="-", event_date=date(2030, 1, 1),
+                      img="default.jpeg", status="Open")
+        db.session.add_all([user, event])
+        db.session.flush()
+        ticket = TicketType(event_id=event.event_id, label="GA", price=10.0, quota=10_000_000)
+        db.session.add(ticket)
+        db.session.commit()
+        return user.user_id, event.event_id, ticket.ticket_type_id
+
+
+def worker(path, profile, ids, seconds, results):
+    from website.booking import book_tickets
+    user_id, event_id, ticket_type_id = ids
+    app = make_app(path, profile)
+    client = app.test_client()
+    reads = writes = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            if random.random() < WRITE_RATIO:
+                with app.app_context():
+                    book_tickets(user_id, ticket_type_id, 1)
+                writes += 1
+            else:
+                client.get(f"/event/{event_id}")
+                reads += 1
+        except OperationalError:
+            errors += 1
+    results.put((reads, writes, errors))
+
+
+def run(profile, workers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "load.db")
+        ids = setup(path, profile)
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=worker, args=(path, profile, ids, seconds, results))
+                 for _ in range(workers)]
+        for p in procs:
+            p.start()
+        totals = [sum(r) for r in zip(*(results.get() for _ in procs))]
+        for p in procs:
+            p.join()
+    reads, writes, errors = totals
+    print(f"{profile:10} {reads / seconds:8.0f} reads/s {writes / seconds:7.0f} bookings/s {errors:5} lock errors")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    for profile in PROFILES:
+        run(profile, args.workers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
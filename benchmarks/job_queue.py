@@ -0,0 +1,95 @@
+# benchmarks/job_queue.py
+# booking POST latency when confirmation work is expensive: run inline on the
+# request thread vs enqueued for `flask jobs work`, then worker throughput
+# draining the queue in batches
+#
+#   python benchmarks/job_queue.py [--bookings 100] [--work-ms 50]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from website import create_app, db
+from website import booking as booking_module
+from website.jobs import HANDLERS, run_batch
+from website.models import User, Event, TicketType, Job
+from website.notifications import booking_confirmation
+from website.passwords import hasher
+
+
+def seed():
+    db.session.add(User(first_name="Fan", email="fan@example.com", password_hash=hasher.hash("pw")))
+    event = Event(title="Queued", description="-", event_date=date(2099, 1, 1), img="default.jpeg", status="Open")
+    db.session.add(event)
+    db.session.flush()
+    ticket = TicketType(event_id=event.event_id, label="GA", price=1.0, quota=1_000_000)
+    db.session.add(ticket)
+    db.session.commit()
+    return event.event_id, ticket.ticket_type_id
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=100)
+    parser.add_argument("--work-ms", type=float, default=50, help="simulated cost of one confirmation")
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    def expensive(payload):
+        time.sleep(args.work_ms / 1000)  # stands in for a PDF ticket or a slow mail relay
+        booking_confirmation(payload)
+
+    HANDLERS["booking_confirmation"] = expensive
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'jobs.db')}",
+                          "WTF_CSRF_ENABLED": False, "RATELIMIT_ENABLED": False,
+                          "PASSWORD_HASH_WORKERS": 0, "NOTIFY_OUTBOX": os.path.join(tmp, "outbox")})
+        with app.app_context():
+            event_id, ticket_type_id = seed()
+        client = app.test_client()
+        client.post("/login", data={"user_name": "fan@example.com", "password": "pw"})
+        data = {"ticket_type": ticket_type_id, "ticket_quantity": 1, "submit": "Book Now"}
+
+        def post_bookings():
+            timings = []
+            for _ in range(args.bookings):
+                t0 = time.perf_counter()
+                client.post(f"/event/{event_id}", data=data)
+                timings.append((time.perf_counter() - t0) * 1000)
+            return timings
+
+        # inline: the old shape, confirmation work done before the redirect
+        enqueue = booking_module.enqueue
+        booking_module.enqueue = lambda kind, payload: expensive(payload)
+        inline = post_bookings()
+        booking_module.enqueue = enqueue
+        queued = post_bookings()
+
+        print(f"{'mode':8} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, timings in (("inline", inline), ("queued", queued)):
+            print(f"{name:8} {percentile(timings, 0.5):>8.1f} {percentile(timings, 0.95):>8.1f}")
+
+        with app.app_context():
+            t0 = time.perf_counter()
+            done = 0
+            while True:
+                ok, failed = run_batch("bench", args.batch_size)
+                if ok + failed == 0:
+                    break
+                done += ok
+            elapsed = time.perf_counter() - t0
+            left = db.session.scalar(db.select(db.func.count()).where(Job.status != "done"))
+        print(f"\nworker drained {done} jobs in {elapsed:.2f}s ({done / elapsed:.1f} jobs/s), {left} not done")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/live_updates.py
+# an on-sale burst watched by many viewers: database statements and updates
+# delivered with everyone on the live stream, against the same viewers
+# refreshing /event/<id> once a second
+#
+#   python benchmarks/live_updates.py [--viewers 20] [--bookings 200] [--seconds 5]
+import argparse
+import http.client
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+from website import create_app, db
+from website.booking import book_tickets
+from website.models import User, Event, TicketType
+from querycount import count_queries
+
+INTERVAL = 0.5
+
+
+def seed(bookings):
+    db.session.add(User(first_name="Fan", email="fan@example.com", password_hash="-"))
+    event = Event(title="On Sale", description="-", event_date=date(2099, 1, 1), img="default.jpeg", status="Open")
+    db.session.add(event)
+    db.session.flush()
+    ticket = TicketType(event_id=event.event_id, label="GA", price=1.0, quota=bookings)
+    db.session.add(ticket)
+    db.session.commit()
+    return event.event_id, ticket.ticket_type_id
+
+
+def viewer(port, path, frames, stop):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", path)
+    response = conn.getresponse()
+    assert response.status == 200, response.status
+    while not stop.is_set():
+        line = response.readline()
+        if not line:
+            break
+        if line.startswith(b"event: availability"):
+            frames.append(time.monotonic())
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--viewers", type=int, default=20)
+    parser.add_argument("--bookings", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'live.db')}",
+                          "LIVE_INTERVAL": INTERVAL, "LIVE_MAX_SUBSCRIBERS": args.viewers,
+                          "RATELIMIT_ENABLED": False})
+        with app.app_context():
+            event_id, ticket_id = seed(args.bookings)
+            engine = db.engine
+            user_id = db.session.scalar(db.select(User.user_id))
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_port
+
+        # refresh polling: one page view per viewer per second
+        client = app.test_client()
+        with count_queries(engine) as statements:
+            client.get(f"/event/{event_id}")
+        per_view = len(statements)
+
+        stop = threading.Event()
+        frames = [[] for _ in range(args.viewers)]
+        threads = [threading.Thread(target=viewer, args=(port, f"/event/{event_id}/live", f, stop), daemon=True)
+                   for f in frames]
+        with count_queries(engine) as statements:
+            for t in threads:
+                t.start()
+            time.sleep(INTERVAL)
+            before = len(statements)
+            started = time.monotonic()
+            # the burst: every ticket sold, evenly over the window
+            with app.app_context():
+                for _ in range(args.bookings):
+                    book_tickets(user_id, ticket_id, 1)
+                    time.sleep(args.seconds / args.bookings)
+                db.session.remove()
+            time.sleep(INTERVAL * 3)
+            window = time.monotonic() - started
+            stop.set()
+            live_statements = [s for s in statements[before:] if "ticket_types.remaining" in s and s.lstrip().upper().startswith("SELECT")]
+        server.shutdown()
+
+        delivered = [len(f) for f in frames]
+        print(f"{args.viewers} viewers, {args.bookings} bookings over {args.seconds:.0f}s, interval {INTERVAL}s")
+        print(f"live stream : {len(live_statements):>5} availability queries, "
+              f"{min(delivered)}-{max(delivered)} updates per viewer (at most {int(window / INTERVAL) + 2}: the initial state + one per interval)")
+        print(f"refreshing  : {int(args.viewers * window * per_view):>5} statements "
+              f"({per_view} per page view, one view per viewer per second)")
+
+
+if __name__ == "__main__":
+    main()
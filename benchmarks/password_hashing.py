@@ -0,0 +1,101 @@
+# benchmarks/password_hashing.py
+# logins per second per core for each hashing scheme/cost, then a login storm
+# through the app with the hashing pool on and off, measuring how long a plain
+# page request takes while the storm is running
+#
+#   python benchmarks/password_hashing.py [--logins 40] [--threads 8]
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from website import create_app, db
+from website.models import User
+from website.passwords import hasher, _hash, _verify
+
+SCHEMES = [
+    ("bcrypt", 10),
+    ("bcrypt", 12),
+    ("scrypt:32768:8:1", None),
+    ("pbkdf2:sha256:600000", None),
+]
+
+
+def per_core(rounds=5):
+    print(f"{'scheme':24} {'cost':>5} {'ms/verify':>10} {'logins/s/core':>14}")
+    for scheme, cost in SCHEMES:
+        stored = _hash(scheme, cost, "correct horse")
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            _verify(stored, "correct horse")
+        each = (time.perf_counter() - t0) / rounds
+        print(f"{scheme:24} {cost or '-':>5} {each * 1000:>10.1f} {1 / each:>14.1f}")
+
+
+def storm(workers, logins, threads, rounds):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'pw.db')}",
+                          "WTF_CSRF_ENABLED": False, "RATELIMIT_ENABLED": False, "PASSWORD_HASH_WORKERS": workers,
+                          "BCRYPT_LOG_ROUNDS": rounds})
+        with app.app_context():
+            db.session.add(User(first_name="Storm", email="storm@example.com",
+                                password_hash=hasher.hash("pw")))
+            db.session.commit()
+
+        done, statuses = threading.Event(), []
+
+        def login_loop(n):
+            client = app.test_client()
+            for _ in range(n):
+                statuses.append(client.post("/login", data={"user_name": "storm@example.com",
+                                                            "password": "pw"}).status_code)
+
+        page_ms = []
+
+        def page_loop():
+            client = app.test_client()
+            while not done.is_set():
+                t0 = time.perf_counter()
+                client.get("/")
+                page_ms.append((time.perf_counter() - t0) * 1000)
+
+        pollers = threading.Thread(target=page_loop)
+        pollers.start()
+        t0 = time.perf_counter()
+        pool = [threading.Thread(target=login_loop, args=(logins // threads,)) for _ in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - t0
+        done.set()
+        pollers.join()
+        hasher.shutdown()
+
+        page_ms.sort()
+        ok = statuses.count(302)
+        p95 = page_ms[int(len(page_ms) * 0.95)] if page_ms else float("nan")
+        print(f"{workers or 'inline':>8} {ok:>6} {len(statuses) - ok:>6} {ok / elapsed:>9.1f} "
+              f"{ok / elapsed / max(workers, 1):>10.1f} {p95:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    per_core()
+    print(f"\nlogin storm, bcrypt cost {args.rounds}, {args.threads} threads, {os.cpu_count()} cpus")
+    print(f"{'workers':>8} {'ok':>6} {'503':>6} {'logins/s':>9} {'per core':>10} {'page p95 ms':>12}")
+    for workers in sorted({0, 1, min(4, os.cpu_count() or 1)}):
+        storm(workers, args.logins, args.threads, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/query_budget.py
+# asserts a fixed SQL statement budget per route, however many comments and
+# bookings exist, and that GET /event/<id> never writes
+#
+#   python benchmarks/query_budget.py
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from website import create_app, db
+from website.models import User, Event, Comment, TicketType, Booking
+from querycount import count_queries
+
+ROWS = 50  # comments and bookings seeded per event / user
+
+# route -> max statements; every request is logged in, but the user_loader is
+# served from the identity cache that login warms
+BUDGETS = {
+    "/": 3,  # listing + genres + carousel feed; the last two are cached after this
+    "/search?query=show": 2,
+    "/event/{event_id}": 3,
+    "/booking/{booking_id}/confirmation": 1,
+    "/bookinghistory": 2,  # page + summary aggregate
+    "/browse?genre=Rock": 2,  # page + one grouped query for every facet count
+    "/api/v1/events": 2,  # page keys and versions + the selected columns
+    "/api/v1/events?fields=id,tickets": 3,  # ... + ticket types
+    "/api/v1/events/{event_id}": 3,  # version + event + ticket types
+    "/api/v1/events/{event_id}/availability": 3,
+}
+
+# a revalidation with a current ETag is answered from the version lookup alone
+CONDITIONAL_BUDGET = 1
+
+
+def seed():
+    users = [User(first_name=f"User{i}", email=f"user{i}@example.com",
+                  password_hash=generate_password_hash("pw")) for i in range(ROWS)]
+    # a past event that is still 'Open' used to be committed as 'Inactive' on read
+    event = Event(title="Budget Show", description="-", event_date=date(2020, 1, 1),
+                  img="default.jpeg", status="Open")
+    db.session.add_all(users + [event])
+    db.session.flush()
+
+    ticket = TicketType(event_id=event.event_id, label="GA", price=20.0, quota=ROWS * 10)
+    db.session.add(ticket)
+    db.session.flush()
+
+    posted = datetime(2025, 1, 1)
+    for i, user in enumerate(users):
+        db.session.add(Comment(content=f"comment {i}", user_id=user.user_id,
+                               event_id=event.event_id, posted_at=posted + timedelta(minutes=i)))
+    bookings = [Booking(user_id=users[0].user_id, ticket_type_id=ticket.ticket_type_id, quantity=1)
+                for _ in range(ROWS)]
+    db.session.add_all(bookings)
+    db.session.commit()
+    return {"event_id": event.event_id, "booking_id": bookings[0].booking_id}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'budget.db')}",
+                          "WTF_CSRF_ENABLED": False})
+        with app.app_context():
+            ids = seed()
+            engine = db.engine
+
+        client = app.test_client()
+        client.post("/login", data={"user_name": "user0@example.com", "password": "pw"})
+
+        failures = []
+        for route, budget in BUDGETS.items():
+            url = route.format(**ids)
+            with count_queries(engine) as statements:
+                response = client.get(url)
+            writes = [s for s in statements if not s.lstrip().upper().startswith("SELECT")]
+            print(f"{url:32} {response.status_code}  {len(statements)} statements (budget {budget})")
+            if response.status_code != 200 or len(statements) > budget or writes:
+                failures.append(url)
+                for statement in statements:
+                    print("   ", " ".join(statement.split())[:100])
+
+        for route in [r for r in BUDGETS if r.startswith("/api/")]:
+            url = route.format(**ids)
+            etag = client.get(url).headers["ETag"]
+            with count_queries(engine) as statements:
+                response = client.get(url, headers={"If-None-Match": etag})
+            print(f"{url:32} {response.status_code}  {len(statements)} statements (If-None-Match, budget {CONDITIONAL_BUDGET})")
+            if response.status_code != 304 or len(statements) > CONDITIONAL_BUDGET:
+                failures.append(f"{url} (conditional)")
+
+        if failures:
+            sys.exit(f"over budget: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# benchmarks/querycount.py
+# counts the SQL statements an engine runs inside a `with` block
+from contextlib import contextmanager
+from sqlalchemy import event
+
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
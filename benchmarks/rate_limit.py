@@ -0,0 +1,79 @@
+# benchmarks/rate_limit.py
+# hammers POST /login and the booking POST past their limits and reports, per
+# storage backend, how many requests were let through, how cheap a 429 is and
+# that a rejection runs no SQL
+#
+#   python benchmarks/rate_limit.py [--requests 200]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from website import create_app, db
+from website.models import User, Event, TicketType
+from website.passwords import hasher
+from querycount import count_queries
+
+
+def seed():
+    db.session.add(User(first_name="Bot", email="bot@example.com", password_hash=hasher.hash("pw")))
+    event = Event(title="Limited", description="-", event_date=date(2099, 1, 1), img="default.jpeg", status="Open")
+    db.session.add(event)
+    db.session.flush()
+    ticket = TicketType(event_id=event.event_id, label="GA", price=1.0, quota=1_000_000)
+    db.session.add(ticket)
+    db.session.commit()
+    return event.event_id, ticket.ticket_type_id
+
+
+def hammer(client, engine, url, data, requests):
+    allowed, rejected, reject_ms, reject_sql = 0, 0, [], 0
+    for _ in range(requests):
+        with count_queries(engine) as statements:
+            t0 = time.perf_counter()
+            response = client.post(url, data=data)
+            elapsed = (time.perf_counter() - t0) * 1000
+        if response.status_code == 429:
+            rejected += 1
+            reject_ms.append(elapsed)
+            reject_sql += len(statements)
+        else:
+            allowed += 1
+    reject_ms.sort()
+    p50 = reject_ms[len(reject_ms) // 2] if reject_ms else float("nan")
+    return allowed, rejected, p50, reject_sql
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'storage':8} {'route':8} {'allowed':>8} {'429':>6} {'429 p50 ms':>11} {'429 SQL':>8}")
+    for storage in ("memory", "file"):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'rl.db')}",
+                              "WTF_CSRF_ENABLED": False, "PASSWORD_HASH_WORKERS": 0,
+                              "BCRYPT_LOG_ROUNDS": 4, "RATELIMIT_STORAGE": storage,
+                              "RATELIMIT_FILE": os.path.join(tmp, "ratelimit.db")})
+            with app.app_context():
+                event_id, ticket_type_id = seed()
+                engine = db.engine
+
+            client = app.test_client()
+            client.post("/login", data={"user_name": "bot@example.com", "password": "pw"})
+            login = {"user_name": "bot@example.com", "password": "wrong"}
+            row = hammer(client, engine, "/login", login, args.requests)
+            print(f"{storage:8} {'login':8} {row[0]:>8} {row[1]:>6} {row[2]:>11.2f} {row[3]:>8}")
+
+            booking = {"ticket_type": ticket_type_id, "ticket_quantity": 1, "submit": "Book Now"}
+            row = hammer(client, engine, f"/event/{event_id}", booking, args.requests)
+            print(f"{storage:8} {'booking':8} {row[0]:>8} {row[1]:>6} {row[2]:>11.2f} {row[3]:>8}")
+
+
+if __name__ == "__main__":
+    main()
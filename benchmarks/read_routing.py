@@ -0,0 +1,136 @@
+# benchmarks/read_routing.py
+# checks read/write routing against two database files: the "replica" is a copy
+# of the primary with the event renamed, so every page shows which one served it.
+# Read-only views read the replica, bookings write the primary, the booker reads
+# their own booking back from the primary until DB_STICKY_SECONDS pass, and a
+# DB_REPLICA = 'readonly' connection refuses writes. After an edit evicts a cached
+# fragment, replica readers don't refill it from their lagging copy
+#
+#   python benchmarks/read_routing.py
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from website import create_app, db
+from website.models import User, Event, TicketType
+from website.cache import evict_event
+from website.passwords import hasher
+from website.routing import STICKY_KEY
+from querycount import count_queries
+
+OPTIONS = {"WTF_CSRF_ENABLED": False, "RATELIMIT_ENABLED": False,
+           "PASSWORD_HASH_WORKERS": 0, "BCRYPT_LOG_ROUNDS": 4}
+
+
+def seed(primary):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{primary}", **OPTIONS})
+    with app.app_context():
+        user = User(first_name="Fan", email="fan@example.com", password_hash=hasher.hash("pw"))
+        event = Event(title="Primary Copy", description="-", event_date=date(2099, 1, 1),
+                      img="default.jpeg", status="Open")
+        db.session.add_all([user, event])
+        db.session.flush()
+        ticket = TicketType(event_id=event.event_id, label="GA", price=10.0, quota=100)
+        db.session.add(ticket)
+        db.session.commit()
+        ids = event.event_id, ticket.ticket_type_id
+        db.session.remove()
+        db.engine.dispose()
+    return ids
+
+
+def remaining(engine, ticket_id):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT remaining FROM ticket_types WHERE ticket_type_id = :t"),
+                            {"t": ticket_id}).scalar()
+
+
+def main():
+    failures = []
+
+    def check(label, ok):
+        print(f"{'ok  ' if ok else 'FAIL'} {label}")
+        if not ok:
+            failures.append(label)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        primary, replica = os.path.join(tmp, "primary.db"), os.path.join(tmp, "replica.db")
+        event_id, ticket_id = seed(primary)
+        shutil.copy(primary, replica)
+        with db.create_engine(f"sqlite:///{replica}").begin() as conn:
+            conn.execute(text("UPDATE events SET title = 'Replica Copy'"))
+
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{primary}",
+                          "DB_REPLICA": f"sqlite:///{replica}", **OPTIONS})
+        with app.app_context():
+            engines = db.engines
+            primary_engine, replica_engine = engines[None], engines["replica"]
+        client = app.test_client()
+
+        with count_queries(primary_engine) as on_primary, count_queries(replica_engine) as on_replica:
+            page = client.get(f"/event/{event_id}").get_data(as_text=True)
+        check("GET /event/<id> is read from the replica", "<title>Replica Copy" in page)
+        check("... without touching the primary", not on_primary and on_replica)
+
+        client.post("/login", data={"user_name": "fan@example.com", "password": "pw"})
+        with count_queries(replica_engine) as on_replica:
+            status = client.get("/bookinghistory").status_code
+        check("GET /bookinghistory is read from the replica", status == 200 and on_replica)
+
+        response = client.post(f"/event/{event_id}", data={"ticket_type": ticket_id, "ticket_quantity": 1,
+                                                           "submit": "Book"})
+        check("booking POST redirects to its confirmation", response.status_code == 302)
+        check("the booking is written to the primary", remaining(primary_engine, ticket_id) == 99)
+        check("... and not to the replica", remaining(replica_engine, ticket_id) == 100)
+
+        confirmation = response.headers["Location"]
+        with count_queries(replica_engine) as on_replica:
+            status = client.get(confirmation).status_code
+        check("the booker reads their booking back from the primary", status == 200 and not on_replica)
+        check("the booker sees the primary's event", "<title>Primary Copy" in client.get(f"/event/{event_id}").get_data(as_text=True))
+
+        with client.session_transaction() as session:
+            session[STICKY_KEY] = 0  # the sticky window has passed
+        check("reads go back to the replica afterwards",
+              "<title>Replica Copy" in client.get(f"/event/{event_id}").get_data(as_text=True))
+        check("... which has not seen the booking yet", client.get(confirmation).status_code == 404)
+
+        # an edit on the primary evicts the event's header; the replica still has the old row
+        header = '<h2 class="fw-bold text-inkwell">'
+        with app.app_context():
+            evict_event(event_id)
+        anonymous = app.test_client()
+        check("after an eviction a replica reader gets the replica's header",
+              header + "Replica Copy" in anonymous.get(f"/event/{event_id}").get_data(as_text=True))
+        with client.session_transaction() as session:
+            session[STICKY_KEY] = time.time() + 60  # the editor, pinned by their write
+        check("... without caching it, so the editor sees their own write",
+              header + "Primary Copy" in client.get(f"/event/{event_id}").get_data(as_text=True))
+        check("... and the primary's header is what gets cached",
+              header + "Primary Copy" in anonymous.get(f"/event/{event_id}").get_data(as_text=True))
+
+        readonly = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{primary}", "DB_REPLICA": "readonly", **OPTIONS})
+        check("DB_REPLICA 'readonly' serves the primary file's data",
+              "<title>Primary Copy" in readonly.test_client().get(f"/event/{event_id}").get_data(as_text=True))
+        with readonly.app_context():
+            try:
+                with db.engines["replica"].begin() as conn:
+                    conn.execute(text("UPDATE events SET title = 'nope'"))
+                refused = False
+            except OperationalError:
+                refused = True
+        check("... and refuses writes", refused)
+
+    if failures:
+        sys.exit(f"{len(failures)} routing checks failed")
+
+
+if __name__ == "__main__":
+    main()
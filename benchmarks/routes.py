@@ -0,0 +1,121 @@
+# benchmarks/routes.py
+# end-to-end route benchmark on generated data (see datagen.py): p50/p95/p99
+# latency, SQL statements per request and peak Python memory for each route,
+# compared against a stored baseline
+#
+#   python benchmarks/routes.py                      # compare with baseline.json
+#   python benchmarks/routes.py --save-baseline      # record a new baseline
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from website import create_app, db
+from website.models import TicketType
+from datagen import generate, DEFAULTS, PASSWORD
+from querycount import count_queries
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def routes(hot, ticket_type_id):
+    return {
+        "index": ("GET", "/", None),
+        "index_genre": ("GET", "/?genre=Jazz", None),
+        "search": ("GET", "/search?query=summer", None),
+        "event_detail": ("GET", f"/event/{hot['popular_event']}", None),
+        "booking_history": ("GET", "/bookinghistory", None),
+        "booking_post": ("POST", f"/event/{hot['popular_event']}",
+                         {"ticket_type": ticket_type_id, "ticket_quantity": 1, "submit": "Book Now"}),
+    }
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def measure(client, engine, method, url, data, requests):
+    timings, statements = [], 0
+    tracemalloc.start()
+    for _ in range(requests):
+        with count_queries(engine) as executed:
+            t0 = time.perf_counter()
+            response = client.open(url, method=method, data=data)
+            timings.append((time.perf_counter() - t0) * 1000)
+        statements += len(executed)
+        if response.status_code >= 400:
+            raise SystemExit(f"{method} {url} returned {response.status_code}")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timings.sort()
+    return {
+        "p50_ms": round(percentile(timings, 0.50), 2),
+        "p95_ms": round(percentile(timings, 0.95), 2),
+        "p99_ms": round(percentile(timings, 0.99), 2),
+        "queries": round(statements / requests, 2),
+        "peak_kb": round(peak / 1024),
+    }
+
+
+def compare(results, baseline):
+    print(f"\n{'route':16} {'metric':8} {'baseline':>10} {'now':>10} {'change':>8}")
+    for route, metrics in results.items():
+        for metric in ("p95_ms", "queries", "peak_kb"):
+            old = baseline.get(route, {}).get(metric)
+            if old is None:
+                continue
+            new = metrics[metric]
+            change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+            print(f"{route:16} {metric:8} {old:>10} {new:>10} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f"--{name}", type=int, default=default)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'routes.db')}",
+                          "WTF_CSRF_ENABLED": False, "RATELIMIT_ENABLED": False})
+        with app.app_context():
+            t0 = time.perf_counter()
+            hot = generate(args.users, args.events, args.bookings, args.comments)
+            print(f"generated data in {time.perf_counter() - t0:.1f}s")
+            ticket = db.session.scalar(db.select(TicketType).where(TicketType.event_id == hot["popular_event"]))
+            # keep the hot ticket type bookable for the POST benchmark
+            ticket.remaining = ticket.quota = 10_000_000
+            db.session.commit()
+            ticket_type_id = ticket.ticket_type_id
+            engine = db.engine
+
+        client = app.test_client()
+        client.post("/login", data={"user_name": f"user{hot['heavy_user']}@example.com", "password": PASSWORD})
+
+        results = {}
+        print(f"\n{'route':16} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'peak KB':>8}")
+        for name, (method, url, data) in routes(hot, ticket_type_id).items():
+            client.open(url, method=method, data=data)  # warm-up
+            r = measure(client, engine, method, url, data, args.requests)
+            results[name] = r
+            print(f"{name:16} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['queries']:>8} {r['peak_kb']:>8}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nbaseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
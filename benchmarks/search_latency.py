@@ -0,0 +1,88 @@
+# benchmarks/search_latency.py
+# compares /search latency for the FTS5 index against the old title ILIKE scan
+#
+#   python benchmarks/search_latency.py --events 100000
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from website import create_app, db
+from website.models import Event
+from website.search import search_events
+
+WORDS = ("live jazz night rock festival comedy tour acoustic session orchestra "
+         "indie electronic showcase summer winter arena club rooftop country").split()
+SYLLABLES = "ka lo mi ra ven to shi dor el fa nu ber qui sa zen ox".split()
+GENRES = ["Hip Hop", "R&B", "Jazz", "Rap", "Electronic", "Comedy", "Indie", "Classical"]
+CITIES = ["Brisbane", "Sydney", "Melbourne", "Perth", "Adelaide", "Hobart"]
+
+
+def artist_names(count):
+    # pseudo artist names give the index a realistic, mostly-unique vocabulary
+    return ["".join(random.choices(SYLLABLES, k=3)).title() for _ in range(count)]
+
+
+def seed(count, artists):
+    rows = []
+    start = date(2025, 1, 1)
+    for i in range(count):
+        artist = random.choice(artists)
+        rows.append({
+            "title": f"{artist} {random.choice(WORDS).title()} Tour",
+            "description": " ".join(random.choices(WORDS + artists[:200], k=40)),
+            "genre": random.choice(GENRES),
+            "location": f"Venue {i % 500}, {random.choice(CITIES)}",
+            "event_date": start + timedelta(days=i % 730),
+            "img": "default.jpeg",
+            "status": "Open",
+        })
+    db.session.execute(db.insert(Event), rows)
+    db.session.commit()
+
+
+def ilike_search(query):
+    # the original /search path: unbounded title scan
+    return Event.query.filter(Event.title.ilike(f'%{query}%')).all()
+
+
+def timed(fn, queries, runs):
+    samples = []
+    for _ in range(runs):
+        for q in queries:
+            t0 = time.perf_counter()
+            fn(q)
+            samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}"})
+        with app.app_context():
+            random.seed(207)
+            t0 = time.perf_counter()
+            artists = artist_names(args.events // 10)
+            seed(args.events, artists)
+            print(f"seeded {args.events} events in {time.perf_counter() - t0:.1f}s")
+
+            # full artist names, artist prefixes and a common word
+            queries = random.sample(artists, 5) + [a[:4] for a in random.sample(artists, 5)] + ["jazz"]
+            for name, fn in (("ilike", ilike_search), ("fts5", search_events)):
+                p50, p95 = timed(fn, queries, args.runs)
+                print(f"{name:6} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
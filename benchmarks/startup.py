@@ -0,0 +1,129 @@
+# benchmarks/startup.py
+# cold start cost: import + create_app + first request and resident memory for
+# the development and production configs (each in a fresh interpreter), then
+# time-to-first-response and per-worker memory under gunicorn with and without
+# --preload
+#
+#   python benchmarks/startup.py [--runs 5] [--workers 2]
+import argparse
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# runs in a child interpreter so every measurement starts cold; the per-process
+# cache stands in for the production Redis one, which isn't part of the measurement
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from website import create_app
+t1 = time.perf_counter()
+app = create_app({"SQLALCHEMY_DATABASE_URI": sys.argv[1], "APP_CONFIG": sys.argv[2], "SECRET_KEY": "bench",
+                  "CACHE_TYPE": "lru"})
+t2 = time.perf_counter()
+app.test_client().get("/")
+t3 = time.perf_counter()
+rss = next(int(l.split()[1]) for l in open("/proc/self/status") if l.startswith("VmRSS"))
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_request": t3 - t2, "rss_kb": rss}))
+"""
+
+
+def probe(uri, config, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE, uri, config], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return {k: statistics.median(s[k] for s in samples) for k in samples[0]}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def smaps(pid):
+    # (Pss, private) in KB; Pss splits pages shared with the master between the sharers
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values.get("Pss", 0), values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def gunicorn(uri, workers, preload):
+    port = free_port()
+    env = dict(os.environ, APP_CONFIG="production", SECRET_KEY="bench", DATABASE_URL=uri, CACHE_TYPE="lru",
+               WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}", GUNICORN_PRELOAD=str(int(preload)))
+    args = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "website:create_app()"]
+    t0 = time.perf_counter()
+    master = subprocess.Popen(args, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5).read()
+                break
+            except OSError:
+                if master.poll() is not None:
+                    raise SystemExit("gunicorn exited during startup")
+                time.sleep(0.02)
+        first = time.perf_counter() - t0
+        # let every worker finish booting before measuring memory
+        deadline = time.time() + 30
+        while len(children(master.pid)) < workers and time.time() < deadline:
+            time.sleep(0.1)
+        time.sleep(1)
+        for _ in range(workers * 4):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5).read()
+        memory = [smaps(pid) for pid in children(master.pid)]
+        return first, memory
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        # migrate once, as `flask db upgrade` would before a deploy
+        subprocess.run([sys.executable, "-c", PROBE, uri, "development"], cwd=ROOT,
+                       capture_output=True, check=True)
+
+        print(f"{'config':12} {'import ms':>10} {'create ms':>10} {'1st req ms':>11} {'RSS MB':>8}")
+        for config in ("development", "production"):
+            r = probe(uri, config, args.runs)
+            print(f"{config:12} {r['import'] * 1000:>10.0f} {r['create_app'] * 1000:>10.0f} "
+                  f"{r['first_request'] * 1000:>11.0f} {r['rss_kb'] / 1024:>8.1f}")
+
+        print(f"\ngunicorn, production config, {args.workers} workers")
+        print(f"{'mode':12} {'1st resp ms':>12} {'Pss MB/worker':>14} {'private MB/worker':>18}")
+        for preload in (False, True):
+            first, memory = gunicorn(uri, args.workers, preload)
+            pss = statistics.mean(m[0] for m in memory) / 1024
+            private = statistics.mean(m[1] for m in memory) / 1024
+            print(f"{'--preload' if preload else 'no preload':12} {first * 1000:>12.0f} {pss:>14.1f} {private:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
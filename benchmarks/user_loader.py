@@ -0,0 +1,55 @@
+# benchmarks/user_loader.py
+# authenticated page views with and without the identity cache:
+# SQL statements per request and mean latency
+#
+#   python benchmarks/user_loader.py --requests 500
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+from website import create_app, db
+from website.identity import identity_cache
+from website.models import User
+from querycount import count_queries
+
+
+def run(client, engine, requests, cached):
+    with count_queries(engine) as statements:
+        t0 = time.perf_counter()
+        for _ in range(requests):
+            if not cached:
+                identity_cache.clear()
+            client.get("/bookinghistory")
+        elapsed = time.perf_counter() - t0
+    label = "cached" if cached else "uncached"
+    print(f"{label:9} {len(statements) / requests:.2f} statements/request  "
+          f"{elapsed / requests * 1000:.2f} ms/request")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'users.db')}",
+                          "WTF_CSRF_ENABLED": False})
+        with app.app_context():
+            db.session.add(User(first_name="Bench", email="bench@example.com",
+                                password_hash=generate_password_hash("pw")))
+            db.session.commit()
+            engine = db.engine
+
+        client = app.test_client()
+        client.post("/login", data={"user_name": "bench@example.com", "password": "pw"})
+        run(client, engine, args.requests, cached=False)
+        run(client, engine, args.requests, cached=True)
+
+
+if __name__ == "__main__":
+    main()
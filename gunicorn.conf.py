@@ -0,0 +1,41 @@
+# gunicorn.conf.py
+# production serving:
+#   flask db upgrade                                   # once per deploy
+#   APP_CONFIG=production SECRET_KEY=... gunicorn -c gunicorn.conf.py "website:create_app()"
+# production caches fragments in Redis (CACHE_REDIS_URL) so every worker sees each eviction
+# the app is built once in the master (imports, config, static manifest, compiled
+# templates) and shared copy-on-write by the forked workers.
+#
+# live availability streams (/event/<id>/live) are long requests: under gthread
+# each one holds a worker thread for up to LIVE_MAX_AGE (300 s). A worker gets
+# LIVE_MAX_SUBSCRIBERS threads for streams on top of GUNICORN_THREADS for ordinary
+# requests, so a full set of viewers can't starve page loads; the host's stream
+# capacity is WEB_CONCURRENCY x LIVE_MAX_SUBSCRIBERS, and /live answers 503 past it.
+# Idle stream threads only wait on a condition, so a few hundred per worker is
+# cheap. GUNICORN_WORKER_CLASS=gevent (needs the gevent package) serves streams
+# from greenlets instead, for viewer counts in the thousands
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+live_streams = int(os.environ.get('LIVE_MAX_SUBSCRIBERS', 128))  # the app reads the same variable
+threads = int(os.environ.get('GUNICORN_THREADS', 32)) + live_streams
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))  # gevent only
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+
+def when_ready(server):
+    # one status sweeper for the host, in the master; workers only serve requests
+    from website.sweeper import start_sweeper
+    start_sweeper(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    # a worker must never reuse a pooled connection the master opened before forking;
+    # close=False leaves the parent's connections alone and just starts a fresh pool
+    from website import db
+    app = worker.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -1,5 +1,7 @@
 from website import create_app
+from website.sweeper import start_sweeper
 
 if __name__ == '__main__':
     app = create_app()
+    start_sweeper(app)  # past events -> Inactive every STATUS_SWEEP_INTERVAL seconds
     app.run()
\ No newline at end of file
@@ -1,5 +1,9 @@
 from website import create_app, db
 from website.models import User, Event, TicketType, Comment, Booking
+from website.search import rebuild_search_index
+from website.sales import rebuild_sales
+from website.feeds import rebuild_feeds
+from website.venues import link_venues
 from datetime import datetime, date, time
 
 app = create_app()
@@ -8,6 +12,8 @@ with app.app_context():
     # Clear any existing data
     db.drop_all()
     db.create_all()
+    # dropping events also dropped the search triggers; recreate them
+    rebuild_search_index()
 
     # -------- USERS --------
     user1 = User(
@@ -40,7 +46,7 @@ with app.app_context():
         end_time=time(22, 30),
         img="Upcoming1.png",
         status="Open",
-        created_by=user1.id,
+        created_by=user1.user_id,
     )
 
     event2 = Event(
@@ -57,52 +63,60 @@ with app.app_context():
         end_time=time(22, 0),
         img="Popular2.png",
         status="Open",
-        created_by=user2.id,
+        created_by=user2.user_id,
     )
 
     db.session.add_all([event1, event2])
     db.session.commit()
 
     # -------- TICKET TYPES --------
-    t1 = TicketType(event_id=event1.id, label="Standard", price=50.00, quota=200)
-    t2 = TicketType(event_id=event1.id, label="VIP", price=120.00, quota=50)
-    t3 = TicketType(event_id=event2.id, label="Standard", price=60.00, quota=150)
+    t1 = TicketType(event_id=event1.event_id, label="Standard", price=50.00, quota=200)
+    t2 = TicketType(event_id=event1.event_id, label="VIP", price=120.00, quota=50)
+    t3 = TicketType(event_id=event2.event_id, label="Standard", price=60.00, quota=150)
     db.session.add_all([t1, t2, t3])
     db.session.commit()
 
     # -------- BOOKINGS --------
-    b1 = Booking(user_id=user1.id, ticket_type_id=t2.id, quantity=2)
-    b2 = Booking(user_id=user2.id, ticket_type_id=t3.id, quantity=4)
+    b1 = Booking(user_id=user1.user_id, ticket_type_id=t2.ticket_type_id, quantity=2)
+    b2 = Booking(user_id=user2.user_id, ticket_type_id=t3.ticket_type_id, quantity=4)
     db.session.add_all([b1, b2])
+    # these skip booking.book_tickets, so take the tickets off remaining here
+    t2.remaining -= b1.quantity
+    t3.remaining -= b2.quantity
     db.session.commit()
 
     # -------- COMMENTS --------
     c1 = Comment(
         content="This event looks awesome!",
-        user_id=user1.id,
-        event_id=event1.id,
+        user_id=user1.user_id,
+        event_id=event1.event_id,
         posted_at=datetime(2025, 10, 20, 6, 1),
     )
     c2 = Comment(
         content="Can’t wait for this show!",
-        user_id=user2.id,
-        event_id=event1.id,
+        user_id=user2.user_id,
+        event_id=event1.event_id,
         posted_at=datetime(2025, 10, 20, 6, 10),
     )
     c3 = Comment(
         content="Such a cool lineup!",
-        user_id=user1.id,
-        event_id=event2.id,
+        user_id=user1.user_id,
+        event_id=event2.event_id,
         posted_at=datetime(2025, 10, 21, 10, 30),
     )
     c4 = Comment(
         content="Booked my tickets already!",
-        user_id=user2.id,
-        event_id=event2.id,
+        user_id=user2.user_id,
+        event_id=event2.event_id,
         posted_at=datetime(2025, 10, 21, 11, 15),
     )
     db.session.add_all([c1, c2, c3, c4])
     db.session.commit()
 
+    # bookings and comments above bypassed the services, so rebuild the rollup, venues and feeds
+    rebuild_sales()
+    link_venues()
+    rebuild_feeds()  # commits the venue links too
+
     print("✅ Sample data created successfully in main.db!")
     print(f"Events: {Event.query.count()} | Users: {User.query.count()} | Bookings: {Booking.query.count()}")
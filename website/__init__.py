@@ -3,24 +3,53 @@ import os
 from flask_bootstrap import Bootstrap5
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from .routing import RoutingSession
 
-db = SQLAlchemy()
+# db.session sends read-only views to the 'replica' bind when one is configured (see routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # create a function that creates a web application
 # a web server will run this web application
-def create_app():
+def create_app(config=None):
 
     app = Flask(__name__)  # this is the name of the module/package that is calling this app
-    # Should be set to false in a production environment
-    app.debug = True
-    app.secret_key = 'somesecretkey'
+    # APP_CONFIG=production turns off debug and schema changes at startup (see config.py)
+    from .config import CONFIGS
+    app.config.from_object(CONFIGS[(config or {}).get('APP_CONFIG') or os.environ.get('APP_CONFIG', 'development')])
 
-    # Configuration of database\
+    # Configuration of database
+    # DATABASE_URL picks the database, DB_PROFILE ('default' or 'production') the tuning (see database.py)
+    from .database import database_uri, init_database
     base_dir = os.path.abspath(os.path.dirname(__file__))
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(base_dir, 'instance', 'main.db')}"
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(base_dir)
+    # overrides (e.g. a different database for benchmarks)
+    app.config.update(config or {})
+    if not app.config['SECRET_KEY']:
+        raise RuntimeError("SECRET_KEY must be set for the production config")
+    if app.config.get('PROXY_FIX'):
+        # behind a proxy remote_addr is the proxy's; rate limits key on the client's (see ratelimit.py)
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX'], x_proto=app.config['PROXY_FIX'])
     Bootstrap5(app)
-    db.init_app(app)
+    init_database(app)
+    from . import routing
+    routing.init_app(app)
+
+    # fragment cache: CACHE_TYPE 'lru' (default) or 'redis' with CACHE_REDIS_URL
+    from .cache import cache
+    cache.init_app(app)
+
+    # password hashing in a bounded process pool (see passwords.py)
+    from .passwords import hasher
+    hasher.init_app(app)
+
+    # token-bucket limits on login and booking POSTs (see ratelimit.py)
+    from .ratelimit import limiter
+    limiter.init_app(app)
+
+    # server-sent availability updates for the details page (see live.py)
+    from .live import live
+    live.init_app(app)
 
     # login manager
     login_manager = LoginManager()
@@ -28,19 +57,35 @@ def create_app():
     login_manager.init_app(app)
 
     # Importing inside the create_app function avoids circular references
-    from .models import User
+    # the loader is served from a per-worker identity cache (see identity.py)
+    from .identity import load_principal
     @login_manager.user_loader
     def load_user(user_id):
-        return db.session.scalar(db.select(User).where(User.user_id == int(user_id)))
+        return load_principal(user_id)
 
     from . import views
     app.register_blueprint(views.main_bp)
 
     from . import auth
     app.register_blueprint(auth.auth_bp)
+
+    from . import api
+    app.register_blueprint(api.api_bp)
     
     from flask import render_template
 
+    # per-request timing, Server-Timing headers and /metrics when INSTRUMENTATION = True
+    from .instrumentation import instrumentation
+    instrumentation.init_app(app)
+
+    # fingerprinted, long-cached static URLs (see assets.py); STATIC_FINGERPRINTS = False turns it off
+    from .assets import assets
+    assets.init_app(app)
+
+    # templates pick the smallest suitable poster: event_img(event, 'card')
+    from .images import event_image_url
+    app.add_template_global(event_image_url, 'event_img')
+
     @app.errorhandler(404)
     def not_found(e):
         return render_template('404.html'), 404
@@ -49,9 +94,37 @@ def create_app():
     def server_error(e):
         return render_template('500.html'), 500
 
-    #makes tables
-    from . import models
-    with app.app_context():
-        db.create_all()
+    # schema changes are versioned migrations (see migrations.py): applied here in
+    # development, by `flask db upgrade` once per deploy in production
+    from .migrations import db_cli, upgrade
+    app.cli.add_command(db_cli)
+    if app.config['AUTO_MIGRATE']:
+        with app.app_context():
+            upgrade(log=app.logger.info)
+
+    # the app's templates (and the bootstrap ones they extend) compiled once before
+    # gunicorn --preload forks, then shared by every worker
+    if app.config['PRELOAD_TEMPLATES']:
+        for name in app.jinja_loader.list_templates():
+            app.jinja_env.get_template(name)
+
+    from .search import search_cli
+    app.cli.add_command(search_cli)
+
+    from .cli import events_cli
+    app.cli.add_command(events_cli)
+
+    from .sales import sales_cli
+    app.cli.add_command(sales_cli)
+
+    from .feeds import feeds_cli
+    app.cli.add_command(feeds_cli)
+
+    # durable job queue, drained by `flask jobs work` (see jobs.py)
+    from . import jobs
+    jobs.init_app(app)
+
+    # the status sweeper is started by whatever serves the app (main.py, gunicorn.conf.py),
+    # not here, so scripts and `flask` commands don't each get a sweeper thread
 
     return app
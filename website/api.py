@@ -0,0 +1,211 @@
+# website/api.py
+# read-only JSON API, /api/v1, for partners and the mobile app:
+#   GET /api/v1/events?genre=&after=&limit=&fields=      keyset-paged event list
+#   GET /api/v1/events/<id>?fields=                      one event with its ticket types
+#   GET /api/v1/events/<id>/availability                 status, prices and remaining quota
+# ?fields= picks columns (only those are selected). Every response carries a strong
+# ETag built from the rows' updated_at; a matching If-None-Match gets a 304 after
+# the version lookup alone, before the full rows are loaded or serialised.
+import hashlib
+from flask import Blueprint, abort, current_app, jsonify, request, url_for
+from . import db
+from .images import event_image_url
+from .models import Event, TicketType
+from .routing import read_only
+from .queries import PAGE_SIZE, encode_cursor, decode_cursor
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+MAX_LIMIT = 100
+
+# API field -> the columns it needs
+EVENT_FIELDS = {
+    'id': [Event.event_id],
+    'title': [Event.title],
+    'description': [Event.description],
+    'genre': [Event.genre],
+    'location': [Event.location],
+    'date': [Event.event_date],
+    'start_time': [Event.start_time],
+    'end_time': [Event.end_time],
+    'status': [Event.status],
+    'image': [Event.img, Event.img_variants],
+    'updated_at': [Event.updated_at],
+    'tickets': [],
+}
+LIST_FIELDS = ('id', 'title', 'genre', 'location', 'date', 'start_time', 'status', 'image')
+DETAIL_FIELDS = tuple(EVENT_FIELDS)
+TICKET_COLUMNS = (TicketType.event_id, TicketType.ticket_type_id, TicketType.label,
+                  TicketType.price, TicketType.quota, TicketType.remaining)
+
+
+class BadRequest(Exception):
+    pass
+
+
+@api_bp.errorhandler(BadRequest)
+def bad_request(e):
+    return jsonify(error=str(e)), 400
+
+
+@api_bp.errorhandler(404)
+def not_found(e):
+    return jsonify(error='not found'), 404
+
+
+def _fields(default):
+    requested = request.args.get('fields')
+    if not requested:
+        return default
+    fields = tuple(dict.fromkeys(f.strip() for f in requested.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in EVENT_FIELDS]
+    if unknown:
+        raise BadRequest(f"unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+# ---- versions and ETags ----
+
+def _ticket_version():
+    # newest ticket change and ticket count, correlated to the outer Event row;
+    # the count catches a deleted ticket type
+    return (db.select(db.func.max(TicketType.updated_at))
+            .where(TicketType.event_id == Event.event_id).scalar_subquery(),
+            db.select(db.func.count(TicketType.ticket_type_id))
+            .where(TicketType.event_id == Event.event_id).scalar_subquery())
+
+
+def _etag(*parts):
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+def _not_modified(etag):
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def _json(body, etag):
+    response = jsonify(body)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # always revalidate; a 304 is cheap
+    return response
+
+
+# ---- loading ----
+
+def _image(img, variants):
+    event = Event(img=img, img_variants=variants)
+    return request.host_url.rstrip('/') + event_image_url(event, 'card')
+
+
+def _load(event_ids, fields):
+    columns = [Event.event_id]
+    for f in fields:
+        columns += [c for c in EVENT_FIELDS[f] if c not in columns]
+    rows = {r.event_id: r for r in db.session.execute(db.select(*columns).where(Event.event_id.in_(event_ids)))}
+    tickets = _tickets(event_ids) if 'tickets' in fields else {}
+
+    records = []
+    for event_id in event_ids:
+        row = rows.get(event_id)
+        if row is None:
+            continue
+        record = {}
+        for f in fields:
+            if f == 'id':
+                record[f] = row.event_id
+            elif f == 'date':
+                record[f] = row.event_date.isoformat()
+            elif f in ('start_time', 'end_time', 'updated_at'):
+                value = getattr(row, f)
+                record[f] = value.isoformat() if value is not None else None
+            elif f == 'image':
+                record[f] = _image(row.img, row.img_variants)
+            elif f == 'tickets':
+                record[f] = tickets.get(event_id, [])
+            else:
+                record[f] = getattr(row, f)
+        records.append(record)
+    return records
+
+
+def _tickets(event_ids):
+    tickets = {}
+    for t in db.session.execute(db.select(*TICKET_COLUMNS)
+                                .where(TicketType.event_id.in_(event_ids))
+                                .order_by(TicketType.ticket_type_id)):
+        tickets.setdefault(t.event_id, []).append({
+            'id': t.ticket_type_id, 'label': t.label, 'price': t.price,
+            'quota': t.quota, 'remaining': t.remaining,
+        })
+    return tickets
+
+
+# ---- endpoints ----
+
+@api_bp.route('/events')
+@read_only
+def events():
+    fields = _fields(LIST_FIELDS)
+    limit = max(1, min(request.args.get('limit', PAGE_SIZE, type=int), MAX_LIMIT))
+    genre = request.args.get('genre')
+    cursor = request.args.get('after')
+    after = decode_cursor(cursor) if cursor else None
+    if cursor and after is None:
+        raise BadRequest('bad cursor')
+
+    # the page's keys and versions only; the same keyset walk as the home page
+    query = db.select(Event.event_id, Event.event_date, Event.updated_at)
+    if 'tickets' in fields:
+        query = query.add_columns(*_ticket_version())
+    if genre:
+        query = query.where(Event.genre == genre)
+    if after:
+        query = query.where(db.tuple_(Event.event_date, Event.event_id) > after)
+    page = db.session.execute(query.order_by(Event.event_date, Event.event_id).limit(limit + 1)).all()
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    page = page[:limit]
+
+    etag = _etag('events', fields, next_cursor, [tuple(r) for r in page])
+    cached = _not_modified(etag)
+    if cached:
+        return cached
+
+    body = {'data': _load([r.event_id for r in page], fields), 'next': None}
+    if next_cursor:
+        body['next'] = url_for('api.events', after=next_cursor, limit=limit, genre=genre,
+                               fields=request.args.get('fields'), _external=True)
+    return _json(body, etag)
+
+
+def _event_version_or_404(event_id):
+    version = db.session.execute(
+        db.select(Event.updated_at, *_ticket_version()).where(Event.event_id == event_id)
+    ).first()
+    if version is None:
+        abort(404)
+    return tuple(version)
+
+
+@api_bp.route('/events/<int:event_id>')
+@read_only
+def event(event_id):
+    fields = _fields(DETAIL_FIELDS)
+    etag = _etag('event', event_id, fields, _event_version_or_404(event_id))
+    cached = _not_modified(etag)
+    if cached:
+        return cached
+    return _json({'data': _load([event_id], fields)[0]}, etag)
+
+
+@api_bp.route('/events/<int:event_id>/availability')
+@read_only
+def availability(event_id):
+    etag = _etag('availability', event_id, _event_version_or_404(event_id))
+    cached = _not_modified(etag)
+    if cached:
+        return cached
+    return _json({'data': _load([event_id], ('id', 'status', 'tickets'))[0]}, etag)
@@ -0,0 +1,140 @@
+# website/assets.py
+# fingerprinted static URLs: url_for('static', filename='style/style.css') becomes
+# /static/style/style.<hash>.css, served with a one-year immutable Cache-Control,
+# ETag/304 handling and precompressed .br/.gz copies when the client accepts them
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip copies are still built
+    brotli = None
+
+MANIFEST = 'manifest.json'
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json'}
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# uploads are already stored under their content hash (see images.py)
+CONTENT_HASHED = re.compile(r'(^|/)[0-9a-f]{32}(-\w+)?\.\w+$')
+
+
+def _walk(static_folder):
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if name == MANIFEST or name.endswith(('.gz', '.br', '.part')):
+                continue
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+
+def fingerprint(filename, digest):
+    base, ext = os.path.splitext(filename)
+    return f"{base}.{digest[:10]}{ext}"
+
+
+def build_manifest(static_folder):
+    manifest = {}
+    for filename, path in _walk(static_folder):
+        if CONTENT_HASHED.search(filename):
+            continue
+        digest = hashlib.md5()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(chunk)
+        manifest[filename] = fingerprint(filename, digest.hexdigest())
+    return manifest
+
+
+def compress_assets(static_folder):
+    # writes name.ext.gz (and name.ext.br with brotli installed) next to each text asset
+    written = 0
+    for filename, path in _walk(static_folder):
+        if os.path.splitext(filename)[1] not in COMPRESSIBLE:
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        written += 1
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+            written += 1
+    return written
+
+
+class Assets:
+    def __init__(self):
+        self.manifest = {}
+        self.reverse = {}
+
+    def init_app(self, app):
+        app.config.setdefault('STATIC_FINGERPRINTS', True)
+        app.extensions['assets'] = self
+        app.cli.add_command(assets_cli)
+        if not app.config['STATIC_FINGERPRINTS']:
+            return
+
+        # a manifest written by `flask assets build` is reused; otherwise hash at startup
+        path = os.path.join(app.static_folder, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = build_manifest(app.static_folder)
+        self.reverse = {v: k for k, v in self.manifest.items()}
+
+        app.url_defaults(self.fingerprint_url)
+        app.view_functions['static'] = self.serve
+
+    def fingerprint_url(self, endpoint, values):
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = self.manifest[values['filename']]
+
+    def serve(self, filename):
+        original = self.reverse.get(filename)
+        immutable = original is not None or CONTENT_HASHED.search(filename) is not None
+        original = original or filename
+        static_folder = current_app.static_folder
+
+        max_age = IMMUTABLE_MAX_AGE if immutable else None
+        served, encoding = original, None
+        if os.path.splitext(original)[1] in COMPRESSIBLE:
+            accepted = request.headers.get('Accept-Encoding', '')
+            for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+                if candidate in accepted and os.path.exists(os.path.join(static_folder, original + suffix)):
+                    served, encoding = original + suffix, candidate
+                    break
+
+        # send_from_directory handles ETag / Last-Modified and answers 304 itself
+        response = send_from_directory(static_folder, served, max_age=max_age,
+                                       mimetype=mimetypes.guess_type(original)[0])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if os.path.splitext(original)[1] in COMPRESSIBLE:
+            response.vary.add('Accept-Encoding')
+        if immutable:
+            response.cache_control.immutable = True
+            response.cache_control.public = True
+        return response
+
+
+assets = Assets()
+
+assets_cli = AppGroup('assets', help='Static asset fingerprints and precompression.')
+
+@assets_cli.command('build')
+def build_command():
+    """Write static/manifest.json and precompressed copies of text assets."""
+    static_folder = current_app.static_folder
+    written = compress_assets(static_folder)
+    manifest = build_manifest(static_folder)
+    with open(os.path.join(static_folder, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    click.echo(f"Fingerprinted {len(manifest)} files, wrote {written} compressed copies.")
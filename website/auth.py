@@ -1,14 +1,21 @@
 from flask import Blueprint, flash, render_template, request, url_for, redirect
 from flask_login import login_user, login_required, logout_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy import func
 from .models import User
 from .forms import LoginForm, RegisterForm
+from .identity import identity_cache, Principal
+from .passwords import hasher, HasherBusy
+from .ratelimit import limiter
 from . import db
 
 auth_bp = Blueprint('auth', __name__)
 
+def busy():
+    # every hashing slot is taken; shed the request cheaply instead of queueing it
+    return 'Too many sign-ins right now, please try again shortly.', 503, {'Retry-After': '2'}
+
 @auth_bp.route('/login', methods=['GET','POST'])
+@limiter.limit('login')
 def login():
     form = LoginForm()
     if form.validate_on_submit():
@@ -17,10 +24,19 @@ def login():
         if not user:
             flash('No account for that email')
             return render_template('login.html', form=form), 401
-        if not check_password_hash(user.password_hash, form.password.data):
-            flash('Incorrect password')
-            return render_template('login.html', form=form), 401
+        try:
+            if not hasher.verify(user.password_hash, form.password.data):
+                flash('Incorrect password')
+                return render_template('login.html', form=form), 401
+            if hasher.needs_rehash(user.password_hash):
+                # hashed with an older scheme or cost; upgrade while we have the plaintext
+                user.password_hash = hasher.hash(form.password.data)
+                db.session.commit()
+        except HasherBusy:
+            return busy()
         login_user(user)
+        # warm the identity cache so the next request needs no user lookup
+        identity_cache.set(user.user_id, Principal.from_user(user))
         nextp = request.args.get('next')
         return redirect(nextp) if nextp and nextp.startswith('/') else redirect(url_for('main.index'))
     return render_template('login.html', form=form)
@@ -35,7 +51,10 @@ def register():
             flash('Username or email already in use')
             return render_template('register.html', form=form), 409
 
-        pw_hash = generate_password_hash(form.password.data)
+        try:
+            pw_hash = hasher.hash(form.password.data)
+        except HasherBusy:
+            return busy()
         user = User(
             first_name = form.first_name.data.strip(),
             last_name  = form.last_name.data.strip(),
@@ -0,0 +1,123 @@
+# website/booking.py
+# booking service: reserves inventory with one conditional UPDATE so concurrent
+# workers can never sell more tickets than a TicketType's quota
+import random
+import sqlite3
+import time
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from . import db
+from .cache import evict_event
+from .schema import add_column
+from .sales import record_sale
+from .jobs import enqueue
+from .feeds import bump
+from .models import Event, TicketType, Booking
+
+MAX_RETRIES = 6
+BACKOFF = 0.02  # seconds, doubled on every retry
+
+
+class NotEnoughTickets(Exception):
+    pass
+
+
+class BookingClosed(NotEnoughTickets):
+    # the event isn't Open (sold out, cancelled, inactive) or has already happened
+    pass
+
+
+def is_busy(error):
+    # SQLITE_BUSY / SQLITE_LOCKED: another connection holds the write lock
+    code = getattr(error.orig, 'sqlite_errorcode', None)
+    return code in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED) or 'database is locked' in str(error.orig)
+
+
+def tickets_sold(ticket_type_id):
+    # SQL expression: tickets booked so far for one ticket type (a column or a bind parameter)
+    return (db.select(db.func.coalesce(db.func.sum(Booking.quantity), 0))
+            .where(Booking.ticket_type_id == ticket_type_id)
+            .scalar_subquery())
+
+
+def tickets_sold_by_type(ticket_type_ids):
+    # ticket_type_id -> tickets booked so far, in one grouped query
+    if not ticket_type_ids:
+        return {}
+    return dict(db.session.execute(
+        db.select(Booking.ticket_type_id, db.func.sum(Booking.quantity))
+        .where(Booking.ticket_type_id.in_(ticket_type_ids))
+        .group_by(Booking.ticket_type_id)
+    ).all())
+
+
+def book_tickets(user_id, ticket_type_id, quantity):
+    for attempt in range(MAX_RETRIES):
+        try:
+            return _reserve(user_id, ticket_type_id, quantity)
+        except OperationalError as e:
+            db.session.rollback()
+            if not is_busy(e) or attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def _reserve(user_id, ticket_type_id, quantity):
+    # the WHERE clause is the oversell guard: the row only changes if enough are left
+    # (a NULL quota means the ticket type is unlimited) and the event is still open and
+    # upcoming, whether or not the status sweeper has caught up with it
+    bookable = (db.select(Event.event_id)
+                .where(Event.event_id == TicketType.event_id)
+                .where(Event.status == 'Open', Event.event_date >= date.today()))
+    reserved = db.session.execute(
+        db.update(TicketType)
+        .where(TicketType.ticket_type_id == ticket_type_id)
+        .where(db.or_(TicketType.remaining.is_(None), TicketType.remaining >= quantity))
+        .where(bookable.exists())
+        .values(remaining=TicketType.remaining - quantity)
+        .returning(TicketType.event_id, TicketType.price)
+    ).first()
+    if reserved is None:
+        db.session.rollback()
+        # only on the failure path: say which check it was
+        if db.session.execute(db.select(TicketType.ticket_type_id)
+                              .where(TicketType.ticket_type_id == ticket_type_id, bookable.exists())).first() is None:
+            raise BookingClosed()
+        raise NotEnoughTickets()
+    event_id, price = reserved
+
+    booking = Booking(user_id=user_id, ticket_type_id=ticket_type_id, quantity=quantity)
+    db.session.add(booking)
+    db.session.flush()
+    record_sale(ticket_type_id, quantity, price)
+    bump(event_id, quantity)
+    # confirmation work runs in `flask jobs work`, committed atomically with the booking
+    enqueue('booking_confirmation', {'booking_id': booking.booking_id})
+
+    # flip the event to 'Sold Out' in the same transaction once nothing is left
+    available = (db.select(TicketType.ticket_type_id)
+                 .where(TicketType.event_id == event_id)
+                 .where(db.or_(TicketType.remaining.is_(None), TicketType.remaining > 0)))
+    sold_out = db.session.execute(
+        db.update(Event)
+        .where(Event.event_id == event_id, Event.status == 'Open')
+        .where(~available.exists())
+        .values(status='Sold Out')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    if sold_out:
+        evict_event(event_id)
+    return booking
+
+
+def add_remaining_column():
+    # older main.db files predate TicketType.remaining; add it and backfill from bookings
+    if not add_column('ticket_types', 'remaining', 'INTEGER'):
+        return
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE ticket_types SET remaining = quota - COALESCE("
+            "(SELECT SUM(quantity) FROM bookings WHERE bookings.ticket_type_id = ticket_types.ticket_type_id), 0)"
+        ))
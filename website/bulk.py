@@ -0,0 +1,246 @@
+# website/bulk.py
+# bulk event + ticket type import/export for `flask events import` / `export`.
+# Files are streamed: CSV (one row per ticket type, event columns repeated) or
+# JSON Lines (one event per line with a nested "ticket_types" list).
+import csv
+import json
+import re
+from datetime import date, time
+from itertools import groupby, islice
+from . import db
+from .booking import tickets_sold
+from .cache import cache
+from .feeds import refresh_events
+from .images import schedule_variants
+from .models import Event, TicketType
+from .schema import dialect_insert
+from .venues import link_venues
+
+EVENT_FIELDS = ['external_ref', 'title', 'description', 'genre', 'location',
+                'event_date', 'start_time', 'end_time', 'img', 'status']
+TICKET_FIELDS = ['label', 'price', 'quota']
+CSV_FIELDS = EVENT_FIELDS + ['ticket_' + f for f in TICKET_FIELDS]
+# site-created events have no external_ref; export names them local-<event_id>.
+# Importing one claims that event only if its title and date still match (or with
+# claim_local, `--claim-local`); otherwise local-<id> is just another external key,
+# so another database's export never overwrites an unrelated event
+LOCAL_REF = re.compile(r'^local-(\d+)$')
+
+
+class BadRecord(ValueError):
+    pass
+
+
+# ---- reading ----
+
+def read_jsonl(lines):
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise BadRecord(f"line {number}: {e}")
+
+
+def read_csv(lines):
+    # consecutive rows with the same external_ref make up one event
+    rows = csv.DictReader(lines)
+    for _, group in groupby(rows, key=lambda r: r['external_ref']):
+        group = list(group)
+        record = {f: group[0].get(f) for f in EVENT_FIELDS}
+        record['ticket_types'] = [
+            {f: r['ticket_' + f] for f in TICKET_FIELDS}
+            for r in group if r.get('ticket_label')
+        ]
+        yield record
+
+
+def _clean(record):
+    if not record.get('external_ref') or not record.get('title') or not record.get('event_date'):
+        raise BadRecord(f"external_ref, title and event_date are required: {record!r:.120}")
+    event = {f: record.get(f) or None for f in EVENT_FIELDS}
+    event['external_ref'] = str(event['external_ref'])
+    event['description'] = event['description'] or ''
+    event['img'] = event['img'] or 'default.jpeg'
+    # a missing status stays None so an existing event keeps its own (see _import_batch)
+    try:
+        event['event_date'] = date.fromisoformat(event['event_date'])
+        for f in ('start_time', 'end_time'):
+            event[f] = time.fromisoformat(event[f]) if event[f] else None
+        tickets = [
+            {'label': t['label'], 'price': float(t['price']),
+             'quota': int(t['quota']) if t.get('quota') not in (None, '') else None}
+            for t in record.get('ticket_types') or []
+        ]
+    except (KeyError, TypeError, ValueError) as e:
+        raise BadRecord(f"event {event['external_ref']}: {e}")
+    return event, tickets
+
+
+# ---- importing ----
+
+def import_events(records, batch_size=1000, claim_local=False):
+    # one transaction per batch; re-running the same file updates rather than duplicates
+    totals = {'events': 0, 'tickets_added': 0, 'tickets_updated': 0}
+    new_images = set()
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        counts, images = _import_batch([_clean(r) for r in batch], claim_local)
+        new_images |= images
+        for key, value in counts.items():
+            totals[key] += value
+    for filename in new_images:
+        schedule_variants(filename)
+    cache.clear()
+    return totals
+
+
+def _upsert_events(rows, update_status):
+    statement = dialect_insert(Event.__table__)
+    table = Event.__table__
+    fields = [f for f in EVENT_FIELDS if f != 'external_ref' and (update_status or f != 'status')]
+    set_ = {f: statement.excluded[f] for f in fields}
+    # variants belong to the old image; a changed one is rebuilt after the batch commits
+    set_['img_variants'] = db.case((table.c.img == statement.excluded.img, table.c.img_variants), else_=None)
+    set_['updated_at'] = statement.excluded.updated_at
+    db.session.execute(statement.on_conflict_do_update(index_elements=['external_ref'], set_=set_), rows)
+
+
+def _import_batch(batch, claim_local=False):
+    events = {e['external_ref']: (e, t) for e, t in batch}  # last row wins within a batch
+
+    # an export re-imported into the same database updates the original rows
+    local_refs = {int(m.group(1)): m.group(0) for m in map(LOCAL_REF.match, events) if m}
+    if local_refs:
+        # a local-<id> an earlier import already stored belongs to that row
+        taken = set(db.session.scalars(db.select(Event.external_ref)
+                                       .where(Event.external_ref.in_(list(local_refs.values())))))
+        local_refs = {i: ref for i, ref in local_refs.items() if ref not in taken}
+    local_ids = []
+    if local_refs:
+        for row in db.session.execute(
+            db.select(Event.event_id, Event.title, Event.event_date)
+            .where(Event.event_id.in_(list(local_refs)), Event.external_ref.is_(None))
+        ):
+            record = events[local_refs[row.event_id]][0]
+            if claim_local or (row.title, row.event_date) == (record['title'], record['event_date']):
+                local_ids.append(row.event_id)
+    if local_ids:
+        db.session.execute(
+            db.update(Event)
+            .where(Event.event_id.in_(local_ids))
+            .values(external_ref='local-' + db.cast(Event.event_id, db.String))
+            .execution_options(synchronize_session=False)
+        )
+
+    old_images = dict(db.session.execute(
+        db.select(Event.external_ref, Event.img).where(Event.external_ref.in_(list(events)))
+    ).all())
+    new_images = {e['img'] for ref, (e, _) in events.items() if ref in old_images and old_images[ref] != e['img']}
+
+    # rows that set a status overwrite it; the rest insert as 'Open' and leave an
+    # existing event's status (Sold Out, Inactive, ...) alone
+    with_status = [e for e, _ in events.values() if e['status']]
+    without_status = [{**e, 'status': 'Open'} for e, _ in events.values() if not e['status']]
+    if with_status:
+        _upsert_events(with_status, update_status=True)
+    if without_status:
+        _upsert_events(without_status, update_status=False)
+
+    ids = dict(db.session.execute(
+        db.select(Event.external_ref, Event.event_id).where(Event.external_ref.in_(list(events)))
+    ).all())
+    existing = {
+        (row.event_id, row.label): row.ticket_type_id
+        for row in db.session.execute(
+            db.select(TicketType.ticket_type_id, TicketType.event_id, TicketType.label)
+            .where(TicketType.event_id.in_(list(ids.values())))
+        )
+    }
+
+    inserts, updates = [], []
+    for ref, (_, tickets) in events.items():
+        for t in tickets:
+            ticket_type_id = existing.get((ids[ref], t['label']))
+            if ticket_type_id is None:
+                inserts.append({'event_id': ids[ref], **t})
+            else:
+                updates.append({'b_id': ticket_type_id, 'b_price': t['price'], 'b_quota': t['quota']})
+
+    if inserts:
+        db.session.execute(db.insert(TicketType.__table__), inserts)
+    if updates:
+        table = TicketType.__table__
+        # remaining moves with the quota so tickets already sold stay sold; a type
+        # that was unlimited counts its bookings instead (as EditEvent does)
+        remaining = db.case(
+            (db.and_(table.c.quota.is_not(None), table.c.remaining.is_not(None)),
+             table.c.remaining + db.bindparam('b_quota') - table.c.quota),
+            else_=db.bindparam('b_quota') - tickets_sold(table.c.ticket_type_id),
+        )
+        db.session.execute(
+            db.update(table)
+            .where(table.c.ticket_type_id == db.bindparam('b_id'))
+            .values(price=db.bindparam('b_price'), quota=db.bindparam('b_quota'), remaining=remaining),
+            updates,
+        )
+
+    # only this batch's events: venues, then their feed rows
+    link_venues(list(ids.values()))
+    refresh_events(list(ids.values()))
+    db.session.commit()
+    return {'events': len(events), 'tickets_added': len(inserts), 'tickets_updated': len(updates)}, new_images
+
+
+# ---- exporting ----
+
+def _event_rows(partition_size=1000):
+    # yields (event_row, [ticket rows]) a partition at a time, never the whole table
+    columns = [Event.event_id] + [getattr(Event, f) for f in EVENT_FIELDS]
+    result = db.session.execute(
+        db.select(*columns).order_by(Event.event_id).execution_options(yield_per=partition_size)
+    )
+    for partition in result.partitions():
+        tickets = {}
+        for t in db.session.execute(
+            db.select(TicketType.event_id, TicketType.label, TicketType.price, TicketType.quota)
+            .where(TicketType.event_id.in_([e.event_id for e in partition]))
+            .order_by(TicketType.ticket_type_id)
+        ):
+            tickets.setdefault(t.event_id, []).append({f: getattr(t, f) for f in TICKET_FIELDS})
+        for event in partition:
+            yield event, tickets.get(event.event_id, [])
+
+
+def _export_record(event):
+    record = {f: getattr(event, f) for f in EVENT_FIELDS}
+    record['external_ref'] = record['external_ref'] or f"local-{event.event_id}"
+    for f in ('event_date', 'start_time', 'end_time'):
+        if record[f] is not None:
+            record[f] = record[f].isoformat(timespec='minutes') if f != 'event_date' else record[f].isoformat()
+    return record
+
+
+def export_jsonl(out):
+    count = 0
+    for event, tickets in _event_rows():
+        record = _export_record(event)
+        record['ticket_types'] = tickets
+        out.write(json.dumps(record) + '\n')
+        count += 1
+    return count
+
+
+def export_csv(out):
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    count = 0
+    for event, tickets in _event_rows():
+        record = _export_record(event)
+        for t in tickets or [{}]:
+            writer.writerow({**record, **{'ticket_' + f: t.get(f) for f in TICKET_FIELDS}})
+        count += 1
+    return count
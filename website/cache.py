@@ -0,0 +1,182 @@
+# website/cache.py
+# small pluggable cache for rendered fragments and lookup results:
+# an in-process LRU with TTL, or a Redis-compatible server when CACHE_TYPE = 'redis'.
+# The cache is never load-bearing: without the redis package the app falls back to
+# the LRU, and while the server is unreachable pages render uncached.
+#
+# With a lagging read replica an eviction leaves a fence for DB_STICKY_SECONDS
+# instead of deleting the key: until it expires, requests reading the replica
+# render the fragment uncached, and only one reading the primary (a non-read-only
+# view, or a user pinned there by their own write) may fill it.
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from .routing import replica_lags, reading_replica
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+# what an unreachable or failing cache server raises
+BACKEND_ERRORS = (redis.RedisError,) if redis else ()
+
+
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (ttl or self.ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class Fence:
+    # stands in for an evicted entry while a replica may still serve the old rows
+    def __init__(self, until):
+        self.until = until  # wall clock, so every worker (and Redis) agrees
+
+
+class RedisCache:
+    def __init__(self, url, ttl=300, prefix='ampd:'):
+        # short timeouts: a slow cache server should cost a page a fraction of a second, not hang it
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=0.25, socket_timeout=0.5)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or self.ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + k for k in keys))
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+class Cache:
+    # front end used by the app; counts hits and misses whatever the backend
+    def __init__(self):
+        self.backend = LRUCache()
+        self.hits = 0
+        self.misses = 0
+        self.logger = None
+        self._warned = 0.0
+        self.fence_seconds = 0
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_TYPE', 'lru')
+        app.config.setdefault('CACHE_TTL', 300)
+        app.config.setdefault('CACHE_MAXSIZE', 4096)
+        self.logger = app.logger
+        self.fence_seconds = app.config.get('DB_STICKY_SECONDS', 10) if replica_lags(app) else 0
+        if app.config['CACHE_TYPE'] == 'redis' and redis is None:
+            app.logger.warning("CACHE_TYPE 'redis' needs the redis package; using the per-process LRU cache, "
+                               "which is only correct with a single worker")
+        elif app.config['CACHE_TYPE'] == 'redis':
+            self.backend = RedisCache(app.config.get('CACHE_REDIS_URL', 'redis://localhost:6379/0'),
+                                      ttl=app.config['CACHE_TTL'])
+        else:
+            self.backend = LRUCache(app.config['CACHE_MAXSIZE'], app.config['CACHE_TTL'])
+
+    def get_or_set(self, key, make):
+        try:
+            value = self.backend.get(key)
+        except BACKEND_ERRORS as e:
+            self._unavailable(e)
+            return make()
+        if isinstance(value, Fence):
+            if reading_replica() and value.until > time.time():
+                return make()  # maybe from the replica's old rows; not worth caching
+            value = None
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = make()
+        try:
+            self.backend.set(key, value)
+        except BACKEND_ERRORS as e:
+            self._unavailable(e)
+        return value
+
+    def delete(self, *keys):
+        try:
+            if self.fence_seconds:
+                fence = Fence(time.time() + self.fence_seconds)
+                for key in keys:
+                    self.backend.set(key, fence, ttl=self.fence_seconds)
+            else:
+                self.backend.delete(*keys)
+        except BACKEND_ERRORS as e:
+            self._unavailable(e)  # entries it missed expire after CACHE_TTL
+
+    def clear(self):
+        try:
+            self.backend.clear()
+        except BACKEND_ERRORS as e:
+            self._unavailable(e)
+
+    def _unavailable(self, error):
+        # at most one warning a minute, not one per fragment
+        if self.logger and time.monotonic() - self._warned > 60:
+            self._warned = time.monotonic()
+            self.logger.warning("cache unavailable, continuing without it: %s", error)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+cache = Cache()
+
+
+# cache keys, so every writer evicts exactly what it affects
+GENRES_KEY = 'genres'
+
+def card_key(event_id):
+    return f'card:{event_id}'
+
+def event_info_key(event_id):
+    return f'event:{event_id}'
+
+def comments_key(event_id):
+    return f'comments:{event_id}'
+
+
+def evict_event(event_id):
+    # the event's row changed (edit, status flip): its card and detail header are stale
+    cache.delete(card_key(event_id), event_info_key(event_id))
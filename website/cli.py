@@ -0,0 +1,62 @@
+# website/cli.py
+# `flask events ...` maintenance commands
+import click
+from flask.cli import AppGroup
+
+events_cli = AppGroup('events', help='Event maintenance commands.')
+
+@events_cli.command('sweep')
+def sweep_command():
+    """Mark every past event as Inactive."""
+    from .sweeper import expire_past_events
+    expired = expire_past_events()
+    click.echo(f"{expired} events marked Inactive.")
+
+@events_cli.command('variants')
+def variants_command():
+    """Build resized WebP variants for every event image."""
+    from . import db
+    from .images import Image, build_variants, record_variants
+    from .models import Event
+    if Image is None:
+        raise click.ClickException("Pillow is not installed.")
+    filenames = db.session.scalars(db.select(Event.img).where(Event.img.is_not(None)).distinct()).all()
+    for filename in filenames:
+        try:
+            record_variants(filename, build_variants(filename))
+        except (OSError, ValueError) as e:
+            click.echo(f"skipped {filename}: {e}")
+    click.echo(f"Variants built for {len(filenames)} images.")
+
+def _format(path, fmt):
+    return fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+
+@events_cli.command('import')
+@click.argument('path', type=click.Path(allow_dash=True))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+@click.option('--batch-size', default=1000, show_default=True, help='Events per transaction.')
+@click.option('--claim-local', is_flag=True,
+              help='local-<id> rows update event <id> even if its title or date changed.')
+def import_command(path, fmt, batch_size, claim_local):
+    """Upsert events and their ticket types from CSV or JSON Lines, keyed on external_ref."""
+    from .bulk import read_csv, read_jsonl, import_events, BadRecord
+    reader = read_csv if _format(path, fmt) == 'csv' else read_jsonl
+    with click.open_file(path, encoding='utf-8') as f:
+        try:
+            totals = import_events(reader(f), batch_size, claim_local)
+        except BadRecord as e:
+            raise click.ClickException(str(e))
+    click.echo(f"Imported {totals['events']} events "
+               f"({totals['tickets_added']} ticket types added, {totals['tickets_updated']} updated).")
+
+@events_cli.command('export')
+@click.argument('path', type=click.Path(allow_dash=True))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Defaults to the file extension.')
+def export_command(path, fmt):
+    """Stream every event with its ticket types to CSV or JSON Lines."""
+    from .bulk import export_csv, export_jsonl
+    writer = export_csv if _format(path, fmt) == 'csv' else export_jsonl
+    with click.open_file(path, 'w', encoding='utf-8') as f:
+        count = writer(f)
+    if path != '-':
+        click.echo(f"Exported {count} events to {path}.")
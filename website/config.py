@@ -0,0 +1,52 @@
+# website/config.py
+# configuration presets, picked with APP_CONFIG ('development' by default or
+# 'production'); create_app(config) overrides still win
+import os
+
+
+class Config:
+    DEBUG = True
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'somesecretkey')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # DB_PROFILE 'default' or 'production' picks the engine/PRAGMA tuning (see database.py)
+    DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+    # DB_REPLICA '' (off), 'readonly' or a replica's URL serves read-only views (see routing.py)
+    DB_REPLICA = os.environ.get('DB_REPLICA', '')
+    # apply pending schema migrations on startup; convenient locally, see migrations.py
+    AUTO_MIGRATE = True
+    # compile every template at startup, so forked workers share them
+    PRELOAD_TEMPLATES = False
+    # seconds between status sweeps (past events -> Inactive, see sweeper.py), run by the
+    # serving process: main.py, or gunicorn's master. 0 leaves it to `flask events sweep`
+    STATUS_SWEEP_INTERVAL = int(os.environ.get('STATUS_SWEEP_INTERVAL', 300))
+    # number of reverse proxies in front of the app (nginx: 1); their X-Forwarded-For
+    # and X-Forwarded-Proto are trusted for remote_addr and the scheme, 0 trusts none
+    PROXY_FIX = int(os.environ.get('PROXY_FIX', 0))
+    # with INSTRUMENTATION on: serve /metrics and /metrics/slow-queries, to anyone
+    # unless METRICS_TOKEN is set (see instrumentation.py)
+    METRICS_ENABLED = True
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+
+class ProductionConfig(Config):
+    # the schema is only changed by `flask db upgrade`, run once per deploy;
+    # workers never reflect or create tables, so they boot fast and can be preloaded
+    DEBUG = False
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    DB_PROFILE = os.environ.get('DB_PROFILE', 'production')
+    AUTO_MIGRATE = False
+    PRELOAD_TEMPLATES = True
+    TEMPLATES_AUTO_RELOAD = False
+    # the slow-query log shows SQL text; only exposed when a deploy opts in with a token
+    METRICS_ENABLED = bool(os.environ.get('METRICS_TOKEN'))
+    # several gunicorn workers: an eviction (or `flask events import`'s clear) must
+    # reach all of them, so fragments live in Redis. The per-process 'lru' cache is
+    # only correct with a single worker (WEB_CONCURRENCY=1)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'redis')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+
+CONFIGS = {
+    'development': Config,
+    'production': ProductionConfig,
+}
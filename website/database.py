@@ -0,0 +1,90 @@
+# website/database.py
+# database profiles: engine pool options plus SQLite PRAGMAs applied to every new connection,
+# and the optional 'replica' bind that read-only views are routed to (see routing.py)
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from . import db
+from .routing import REPLICA
+
+PROFILES = {
+    # SQLite defaults: rollback journal, no busy timeout
+    'default': {
+        'pragmas': {},
+        'engine': {},
+    },
+    # many gunicorn workers on one file: readers never block the writer and
+    # writers wait for the lock instead of failing with "database is locked"
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,          # ms
+            'mmap_size': 268435456,        # 256 MB
+            'cache_size': -64000,          # negative = KiB, so 64 MB
+            'temp_store': 'MEMORY',
+        },
+        'engine': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_recycle': 1800,
+            'pool_pre_ping': True,
+        },
+    },
+}
+
+
+def database_uri(base_dir):
+    # DATABASE_URL lets the same app run on PostgreSQL; fall back to the bundled SQLite file
+    uri = os.environ.get('DATABASE_URL')
+    if not uri:
+        return f"sqlite:///{os.path.join(base_dir, 'instance', 'main.db')}"
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+# PRAGMAs a mode=ro connection must not run
+WRITE_PRAGMAS = ('journal_mode',)
+
+
+def replica_uri(primary, replica):
+    # DB_REPLICA: '' (none), 'readonly' (the primary SQLite file opened mode=ro) or a database URL
+    if replica != 'readonly':
+        return replica or None
+    url = make_url(primary)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        raise RuntimeError("DB_REPLICA 'readonly' needs a SQLite database file")
+    return f"sqlite:///file:{url.database}?mode=ro&uri=true"
+
+
+def init_database(app):
+    profile = PROFILES[app.config['DB_PROFILE']]
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    in_memory = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+    replica = replica_uri(app.config['SQLALCHEMY_DATABASE_URI'], app.config.get('DB_REPLICA'))
+    if replica:
+        app.config['SQLALCHEMY_BINDS'] = {**app.config.get('SQLALCHEMY_BINDS', {}), REPLICA: replica}
+
+    if not in_memory:
+        options = dict(profile['engine'])
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    db.init_app(app)
+
+    if url.get_backend_name() == 'sqlite' and profile['pragmas']:
+        with app.app_context():
+            event.listen(db.engine, 'connect', _pragma_hook(profile['pragmas']))
+            if replica and make_url(replica).get_backend_name() == 'sqlite':
+                read_pragmas = {k: v for k, v in profile['pragmas'].items() if k not in WRITE_PRAGMAS}
+                event.listen(db.engines[REPLICA], 'connect', _pragma_hook(read_pragmas))
+
+
+def _pragma_hook(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return set_pragmas
@@ -0,0 +1,104 @@
+# website/facets.py
+# /browse: upcoming events filtered by date range, genre, venue and city, with a
+# count beside every value of every facet. All the counts come from one grouped
+# query: events in the date range grouped by (day, genre, venue), an index-only
+# scan of ix_events_date_genre_venue, joined to the venues it names. The cells
+# are folded in Python; each facet is counted with the other facets' filters
+# applied but not its own, so picking a genre still lists the other genres.
+# Without a 'to' date the range is DEFAULT_DAYS long, so that query (run on every
+# page, ?after= ones too) reads a bounded slice of the index rather than every
+# upcoming event.
+from collections import Counter
+from datetime import date, timedelta
+from . import db
+from .models import Event, Venue
+from .queries import PAGE_SIZE, paginate_events
+
+FACETS = ('genre', 'venue', 'city')
+DEFAULT_DAYS = 180
+
+
+def parse_filters(args):
+    # query string -> filters; unparseable values are ignored, 'from' defaults to
+    # today and 'to' to DEFAULT_DAYS after it
+    def day(name):
+        try:
+            return date.fromisoformat(args.get(name, ''))
+        except ValueError:
+            return None
+
+    date_from = day('from') or date.today()
+    # venues store the city title-cased (see venues.parse_location), so ?city=sydney matches
+    city = ' '.join(args.get('city', '').split()).title()
+    return {
+        'date_from': date_from,
+        'date_to': day('to') or date_from + timedelta(days=DEFAULT_DAYS),
+        'genre': args.get('genre') or None,
+        'venue': args.get('venue', type=int),
+        'city': city or None,
+    }
+
+
+def filter_args(filters):
+    # filters -> query string arguments, for links that change one of them
+    args = {'from': filters['date_from'].isoformat(), 'to': filters['date_to'].isoformat(),
+            'genre': filters['genre'], 'venue': filters['venue'], 'city': filters['city']}
+    return {k: v for k, v in args.items() if v}
+
+
+def _date_range(filters):
+    return [Event.event_date >= filters['date_from'], Event.event_date <= filters['date_to']]
+
+
+def browse_events(filters, cursor=None, page_size=PAGE_SIZE):
+    query = db.select(Event).where(*_date_range(filters))
+    if filters['genre']:
+        query = query.where(Event.genre == filters['genre'])
+    if filters['venue']:
+        query = query.where(Event.venue_id == filters['venue'])
+    if filters['city']:
+        query = query.where(Event.venue_id.in_(db.select(Venue.venue_id).where(Venue.city == filters['city'])))
+    return paginate_events(query, cursor, page_size)
+
+
+def facet_counts(filters):
+    cells = (db.select(Event.event_date, Event.genre, Event.venue_id, db.func.count().label('events'))
+             .where(*_date_range(filters))
+             .group_by(Event.event_date, Event.genre, Event.venue_id)
+             .subquery())
+    rows = db.session.execute(
+        db.select(cells, Venue.name, Venue.city)
+        .outerjoin(Venue, Venue.venue_id == cells.c.venue_id)
+    ).all()
+
+    def matches(row, skip):
+        values = {'genre': row.genre, 'venue': row.venue_id, 'city': row.city}
+        return all(filters[f] is None or values[f] == filters[f] for f in FACETS if f != skip)
+
+    total = 0
+    months, genres, venues, cities = Counter(), Counter(), Counter(), Counter()
+    venue_names = {}
+    for row in rows:
+        if matches(row, None):
+            total += row.events
+            months[row.event_date.replace(day=1)] += row.events
+        if row.genre and matches(row, 'genre'):
+            genres[row.genre] += row.events
+        if row.venue_id and matches(row, 'venue'):
+            venues[row.venue_id] += row.events
+            venue_names[row.venue_id] = f"{row.name}, {row.city}" if row.city else row.name
+        if row.city and matches(row, 'city'):
+            cities[row.city] += row.events
+
+    return {
+        'total': total,
+        # (first day, last day, count) per month, for links that narrow the date range
+        'months': [(m, _month_end(m), n) for m, n in sorted(months.items())],
+        'genres': sorted(genres.items()),
+        'cities': sorted(cities.items()),
+        'venues': [(v, venue_names[v], n) for v, n in sorted(venues.items(), key=lambda i: (-i[1], venue_names[i[0]]))],
+    }
+
+
+def _month_end(first):
+    return (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
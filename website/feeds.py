@@ -0,0 +1,143 @@
+# website/feeds.py
+# precomputed home page feeds (EventFeed). Every upcoming event has a row in
+# 'popular' and 'genre:<genre>' (scored by tickets booked plus weighted comments).
+# Bookings and comments bump the scores in their own transaction; `flask feeds
+# rebuild` (or a feeds_rebuild job) recomputes them. Rows of events that have
+# happened are dropped by the status sweeper and by every refresh, so they can't
+# pile up at the top of a feed when the sweeper isn't running.
+from datetime import date
+import click
+from flask.cli import AppGroup
+from . import db
+from .cache import cache
+from .jobs import handler
+from .models import Event, EventFeed, Comment, TicketType, Booking
+from .sweeper import FINAL_STATUSES
+
+COMMENT_WEIGHT = 2  # a comment counts as much as this many tickets
+CAROUSEL_SIZE = 3
+MAX_ORDINAL = date.max.toordinal()
+
+
+def genre_feed(genre):
+    return f'genre:{genre}'
+
+
+def carousel_key(genre):
+    return f'carousel:{genre or "All"}'
+
+
+def evict_carousels(*genres):
+    cache.delete(carousel_key(None), *{carousel_key(g) for g in genres if g})
+
+
+def soonness(event_date):
+    # in (0, 1), larger for earlier dates; fixed per date so rebuilds and bumps agree
+    return (MAX_ORDINAL - event_date.toordinal()) / MAX_ORDINAL
+
+
+def _eligible(query, today=None):
+    return (query.where(Event.event_date >= (today or date.today()))
+            .where(db.or_(Event.status.is_(None), Event.status.not_in(FINAL_STATUSES))))
+
+
+def _feed_rows(event_ids=None, today=None):
+    tickets = (db.select(db.func.sum(Booking.quantity))
+               .join(TicketType, Booking.ticket_type_id == TicketType.ticket_type_id)
+               .where(TicketType.event_id == Event.event_id)
+               .scalar_subquery())
+    comments = (db.select(db.func.count(Comment.comment_id))
+                .where(Comment.event_id == Event.event_id)
+                .scalar_subquery())
+    query = _eligible(db.select(Event.event_id, Event.genre, Event.event_date,
+                                db.func.coalesce(tickets, 0), db.func.coalesce(comments, 0)), today)
+    if event_ids is not None:
+        query = query.where(Event.event_id.in_(event_ids))
+
+    rows = []
+    for event_id, genre, event_date, ticket_count, comment_count in db.session.execute(query):
+        # the fraction only breaks ties (sooner first); bumps add whole points
+        popularity = ticket_count + COMMENT_WEIGHT * comment_count + soonness(event_date)
+        rows.append({'feed': 'popular', 'event_id': event_id, 'score': popularity})
+        if genre:
+            rows.append({'feed': genre_feed(genre), 'event_id': event_id, 'score': popularity})
+    return rows
+
+
+def rebuild_feeds(today=None):
+    rows = _feed_rows(today=today)
+    db.session.execute(db.delete(EventFeed))
+    if rows:
+        db.session.execute(db.insert(EventFeed), rows)
+    db.session.commit()
+    evict_carousels(*(r['feed'][len('genre:'):] for r in rows if r['feed'].startswith('genre:')))
+    return len(rows)
+
+
+def refresh_event(event_id):
+    # after an event is created or edited; runs inside the caller's transaction
+    refresh_events([event_id])
+
+
+def refresh_events(event_ids):
+    # a batch of events (bulk import), without touching any other event's rows
+    db.session.execute(db.delete(EventFeed).where(EventFeed.event_id.in_(event_ids)))
+    rows = _feed_rows(event_ids)
+    if rows:
+        db.session.execute(db.insert(EventFeed), rows)
+    remove_past_events()
+
+
+def remove_past_events(today=None):
+    # one pass over the feed rows with a primary-key lookup each, so the cost is
+    # bounded by the upcoming events rather than by every event that ever happened
+    past = (db.select(Event.event_id)
+            .where(Event.event_id == EventFeed.event_id, Event.event_date < (today or date.today())))
+    return db.session.execute(db.delete(EventFeed).where(past.exists())).rowcount
+
+
+def remove_events(event_ids):
+    if event_ids:
+        db.session.execute(db.delete(EventFeed).where(EventFeed.event_id.in_(event_ids)))
+
+
+def bump(event_id, points):
+    # a booking or comment; events that aren't in any feed are left alone
+    db.session.execute(
+        db.update(EventFeed)
+        .where(EventFeed.event_id == event_id)
+        .values(score=EventFeed.score + points)
+    )
+
+
+def feed_events(feed, limit):
+    # top rows of one feed: an index range scan on (feed, score) plus primary-key lookups
+    return db.session.execute(
+        db.select(Event.event_id, Event.title, Event.description, Event.img, Event.img_variants,
+                  EventFeed.score)
+        .join(EventFeed, EventFeed.event_id == Event.event_id)
+        .where(EventFeed.feed == feed)
+        .where(Event.event_date >= date.today())  # in case the sweeper hasn't run yet today
+        .order_by(EventFeed.score.desc())
+        .limit(limit)
+    ).all()
+
+
+def carousel_events(genre=None):
+    # most popular upcoming events (soonest first until anything has been booked)
+    feed = genre_feed(genre) if genre and genre != 'All' else 'popular'
+    return feed_events(feed, CAROUSEL_SIZE)
+
+
+@handler('feeds_rebuild')
+def feeds_rebuild_job(payload):
+    rebuild_feeds()
+
+
+feeds_cli = AppGroup('feeds', help='Manage the precomputed home page feeds.')
+
+@feeds_cli.command('rebuild')
+def rebuild_command():
+    """Recompute every feed from events, bookings and comments."""
+    rows = rebuild_feeds()
+    click.echo(f"Feeds rebuilt: {rows} rows.")
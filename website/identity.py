@@ -0,0 +1,59 @@
+# website/identity.py
+# per-worker cache for the flask-login user_loader: logged-in requests get a small
+# Principal from memory instead of a SELECT on users every time
+from sqlalchemy import event
+from . import db
+from .cache import LRUCache
+from .models import User
+
+# TTL bounds how stale another worker's copy can get after a profile change
+identity_cache = LRUCache(maxsize=10000, ttl=300)
+
+
+class Principal:
+    # just the fields the views and templates read from current_user
+    __slots__ = ('user_id', 'first_name', 'last_name', 'email')
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, user_id, first_name, last_name, email):
+        self.user_id = user_id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.email = email
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.user_id, user.first_name, user.last_name, user.email)
+
+    def get_id(self):
+        return str(self.user_id)
+
+    def __eq__(self, other):
+        return isinstance(other, Principal) and other.user_id == self.user_id
+
+    def __repr__(self):
+        return f'<Principal {self.user_id}>'
+
+
+def load_principal(user_id):
+    user_id = int(user_id)
+    principal = identity_cache.get(user_id)
+    if principal is None:
+        row = db.session.execute(
+            db.select(User.user_id, User.first_name, User.last_name, User.email)
+            .where(User.user_id == user_id)
+        ).first()
+        if row is None:
+            return None
+        principal = Principal(*row)
+        identity_cache.set(user_id, principal)
+    return principal
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _evict_user(mapper, connection, target):
+    identity_cache.delete(target.user_id)
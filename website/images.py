@@ -0,0 +1,132 @@
+# website/images.py
+# event poster uploads: streamed to disk under a content-hash name (identical
+# uploads share one file) and resized to WebP variants on a background pool
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, url_for
+from . import db
+from .cache import evict_event
+from .models import Event
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional dependency; templates fall back to the original upload
+    Image = None
+
+CHUNK_SIZE = 64 * 1024
+ALLOWED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.avif', '.gif'}
+
+# variant name -> bounding box; smallest first
+VARIANTS = {
+    'thumb': (320, 180),
+    'card': (640, 360),
+    'hero': (1600, 900),
+}
+
+_pool = None
+
+
+class UnsupportedImage(Exception):
+    pass
+
+
+def image_dir():
+    return os.path.join(current_app.static_folder, 'img')
+
+
+def variant_filename(filename, variant):
+    return f"variants/{os.path.splitext(filename)[0]}-{variant}.webp"
+
+
+def save_upload(file_storage):
+    # stream the upload in chunks, hashing as we go; returns the stored filename
+    ext = os.path.splitext(file_storage.filename)[1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise UnsupportedImage(ext)
+
+    folder = image_dir()
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file_storage.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+        filename = digest.hexdigest()[:32] + ext
+        target = os.path.join(folder, filename)
+        if os.path.exists(target):
+            os.remove(tmp_path)  # same bytes already stored
+        else:
+            os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return filename
+
+
+def schedule_variants(filename):
+    # call after the event row is committed; the worker records what it built on it
+    if Image is None or not filename:
+        return None
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=current_app.config.get('IMAGE_WORKERS', 2),
+                                   thread_name_prefix='image-variants')
+    return _pool.submit(_build_variants, current_app._get_current_object(), filename)
+
+
+def _build_variants(app, filename):
+    with app.app_context():
+        try:
+            built = build_variants(filename)
+            record_variants(filename, built)
+        except Exception:
+            app.logger.exception("could not build image variants for %s", filename)
+        finally:
+            db.session.remove()
+
+
+def build_variants(filename):
+    folder = image_dir()
+    os.makedirs(os.path.join(folder, 'variants'), exist_ok=True)
+    built = []
+    with Image.open(os.path.join(folder, filename)) as source:
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ('RGB', 'RGBA'):
+            source = source.convert('RGBA')
+        for name, size in VARIANTS.items():
+            path = os.path.join(folder, variant_filename(filename, name))
+            if not os.path.exists(path):
+                image = source.copy()
+                image.thumbnail(size, Image.LANCZOS)
+                image.save(path, 'WEBP', quality=80, method=4)
+            built.append(name)
+    return built
+
+
+def record_variants(filename, built):
+    # every event using this (deduplicated) file gets the variant list
+    event_ids = db.session.scalars(
+        db.update(Event)
+        .where(Event.img == filename)
+        .values(img_variants=','.join(built))
+        .returning(Event.event_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    for event_id in event_ids:
+        evict_event(event_id)
+
+
+def event_image_url(event, variant):
+    # template helper: the requested variant when it has been built, else the original
+    filename = event.img or 'default.jpeg'
+    if event.img_variants and variant in event.img_variants.split(','):
+        filename = variant_filename(filename, variant)
+    return url_for('static', filename='img/' + filename)
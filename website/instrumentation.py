@@ -0,0 +1,194 @@
+# website/instrumentation.py
+# per-request cost accounting, switched on with INSTRUMENTATION = True:
+# wall time, SQL statement count/time and template render time per request,
+# exposed as a Server-Timing header, a rolling slow-query log (with the query
+# plan) and Prometheus-style histograms at /metrics. Numbers are per process.
+# The two endpoints need METRICS_ENABLED (off in production) and, when
+# METRICS_TOKEN is set, an "Authorization: Bearer <token>" header; otherwise 404.
+import hmac
+import threading
+import time
+from collections import defaultdict, deque
+from flask import abort, g, has_request_context, jsonify, request, before_render_template, template_rendered
+from sqlalchemy import event
+from . import db
+
+# request duration buckets, seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+
+class Instrumentation:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations = defaultdict(Histogram)
+        self.sql_statements = defaultdict(int)
+        self.sql_seconds = defaultdict(float)
+        self.slow_queries = deque(maxlen=100)
+        self.slow_query_ms = 100
+
+    def init_app(self, app):
+        app.config.setdefault('INSTRUMENTATION', False)
+        app.config.setdefault('SLOW_QUERY_MS', 100)
+        app.config.setdefault('SLOW_QUERY_LOG_SIZE', 100)
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_TOKEN', None)
+        if not app.config['INSTRUMENTATION']:
+            return
+        self.app = app
+        self.slow_query_ms = app.config['SLOW_QUERY_MS']
+        self.slow_queries = deque(maxlen=app.config['SLOW_QUERY_LOG_SIZE'])
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._render_start, app)
+        template_rendered.connect(self._render_end, app)
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._sql_start)
+                event.listen(engine, 'after_cursor_execute', self._sql_end)
+                event.listen(engine, 'handle_error', self._sql_error)
+
+        if app.config['METRICS_ENABLED']:
+            app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+            app.add_url_rule('/metrics/slow-queries', 'slow_queries', self.slow_queries_view)
+
+    # ---- request ----
+
+    def _start(self):
+        g.perf = {'start': time.perf_counter(), 'sql': 0, 'sql_time': 0.0,
+                  'tpl_time': 0.0, 'tpl_stack': []}
+
+    def _finish(self, response):
+        perf = g.pop('perf', None)
+        if perf is None:
+            return response
+        elapsed = time.perf_counter() - perf['start']
+        endpoint = request.endpoint or 'unknown'
+        with self.lock:
+            self.durations[endpoint].observe(elapsed)
+            self.sql_statements[endpoint] += perf['sql']
+            self.sql_seconds[endpoint] += perf['sql_time']
+        response.headers['Server-Timing'] = (
+            f'app;dur={elapsed * 1000:.1f}, '
+            f'db;dur={perf["sql_time"] * 1000:.1f};desc="{perf["sql"]} queries", '
+            f'tpl;dur={perf["tpl_time"] * 1000:.1f}'
+        )
+        return response
+
+    # ---- templates (nested renders count once, at the outermost level) ----
+
+    def _render_start(self, sender, template, context, **extra):
+        if has_request_context() and 'perf' in g:
+            g.perf['tpl_stack'].append(time.perf_counter())
+
+    def _render_end(self, sender, template, context, **extra):
+        if has_request_context() and 'perf' in g and g.perf['tpl_stack']:
+            started = g.perf['tpl_stack'].pop()
+            if not g.perf['tpl_stack']:
+                g.perf['tpl_time'] += time.perf_counter() - started
+
+    # ---- SQL ----
+
+    def _sql_start(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append((context, time.perf_counter()))
+
+    def _sql_end(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()[1]
+        if has_request_context() and 'perf' in g:
+            g.perf['sql'] += 1
+            g.perf['sql_time'] += elapsed
+        if elapsed * 1000 >= self.slow_query_ms:
+            self._log_slow_query(conn, cursor, statement, parameters, executemany, elapsed)
+
+    def _sql_error(self, context):
+        # a statement that raised never reaches after_cursor_execute; drop its start
+        # time so the next statement on this connection doesn't pop the wrong one
+        conn = context.connection
+        stack = conn.info.get('query_start') if conn is not None else None
+        if stack and stack[-1][0] is context.execution_context:
+            stack.pop()
+
+    def _log_slow_query(self, conn, cursor, statement, parameters, executemany, elapsed):
+        plan = None
+        if not executemany and statement.lstrip().upper().startswith('SELECT'):
+            plan = self._query_plan(conn, cursor, statement, parameters)
+        entry = {
+            'ms': round(elapsed * 1000, 1),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'statement': ' '.join(statement.split()),
+            'plan': plan,
+            'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with self.lock:
+            self.slow_queries.append(entry)
+        self.app.logger.warning("slow query (%.1f ms) on %s: %s", entry['ms'], entry['endpoint'], entry['statement'])
+
+    def _query_plan(self, conn, cursor, statement, parameters):
+        # a fresh DBAPI cursor, so the plan lookup doesn't re-enter these hooks
+        prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+        try:
+            plan_cursor = cursor.connection.cursor()
+            plan_cursor.execute(prefix + statement, parameters)
+            rows = plan_cursor.fetchall()
+            plan_cursor.close()
+        except Exception as e:
+            return f'unavailable: {e}'
+        return [' '.join(str(c) for c in row[-1:]) for row in rows]
+
+    # ---- endpoints ----
+
+    def _authorise(self):
+        token = self.app.config['METRICS_TOKEN']
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(404)
+
+    def metrics_view(self):
+        from .cache import cache
+        self._authorise()
+        lines = [
+            '# HELP ampd_request_duration_seconds Request wall time by endpoint.',
+            '# TYPE ampd_request_duration_seconds histogram',
+        ]
+        with self.lock:
+            for endpoint, hist in sorted(self.durations.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), hist.counts):
+                    cumulative += count
+                    lines.append(f'ampd_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+                lines.append(f'ampd_request_duration_seconds_sum{{endpoint="{endpoint}"}} {hist.total:.6f}')
+                lines.append(f'ampd_request_duration_seconds_count{{endpoint="{endpoint}"}} {hist.count}')
+            lines += ['# HELP ampd_sql_statements_total SQL statements executed by endpoint.',
+                      '# TYPE ampd_sql_statements_total counter']
+            lines += [f'ampd_sql_statements_total{{endpoint="{e}"}} {n}' for e, n in sorted(self.sql_statements.items())]
+            lines += ['# HELP ampd_sql_seconds_total Time spent in SQL by endpoint.',
+                      '# TYPE ampd_sql_seconds_total counter']
+            lines += [f'ampd_sql_seconds_total{{endpoint="{e}"}} {s:.6f}' for e, s in sorted(self.sql_seconds.items())]
+        stats = cache.stats()
+        lines += ['# TYPE ampd_cache_hits_total counter', f'ampd_cache_hits_total {stats["hits"]}',
+                  '# TYPE ampd_cache_misses_total counter', f'ampd_cache_misses_total {stats["misses"]}']
+        return '\n'.join(lines) + '\n', 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+    def slow_queries_view(self):
+        self._authorise()
+        with self.lock:
+            return jsonify(list(self.slow_queries))
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,177 @@
+# website/jobs.py
+# durable job queue on the app's own database. enqueue() adds a row to the
+# caller's transaction, so a job exists exactly when the change that needs it
+# was committed. `flask jobs work` claims due jobs in batches with one UPDATE,
+# runs their handlers, retries failures with exponential backoff and moves a job
+# to 'dead' after JOB_MAX_ATTEMPTS.
+import json
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from . import db
+from .models import Job
+
+# kind -> handler(payload); filled in by @handler (see notifications.py)
+HANDLERS = {}
+
+
+def handler(kind):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, payload=None, delay=0):
+    # added to the current session; committed (or rolled back) with the caller's work
+    job = Job(kind=kind, payload=json.dumps(payload or {}),
+              run_after=datetime.now() + timedelta(seconds=delay))
+    db.session.add(job)
+    return job
+
+
+def requeue_stale(timeout):
+    # jobs whose worker died mid-run go back to the queue
+    cutoff = datetime.now() - timedelta(seconds=timeout)
+    result = db.session.execute(
+        db.update(Job)
+        .where(Job.status == 'running', Job.locked_at < cutoff)
+        .values(status='queued', locked_by=None, locked_at=None)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def claim(worker, batch_size):
+    # one statement claims the batch; a job another worker took first no longer matches
+    now = datetime.now()
+    due = (db.select(Job.job_id)
+           .where(Job.status == 'queued', Job.run_after <= now)
+           .order_by(Job.run_after, Job.job_id)
+           .limit(batch_size)
+           .scalar_subquery())
+    rows = db.session.execute(
+        db.update(Job)
+        .where(Job.job_id.in_(due), Job.status == 'queued')
+        .values(status='running', attempts=Job.attempts + 1, locked_by=worker, locked_at=now)
+        .returning(Job.job_id, Job.kind, Job.payload, Job.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return sorted(rows, key=lambda r: r.job_id)
+
+
+def run_batch(worker, batch_size):
+    config = current_app.config
+    jobs = claim(worker, batch_size)
+    done = []
+    for job in jobs:
+        try:
+            fn = HANDLERS.get(job.kind)
+            if fn is None:
+                raise LookupError(f"no handler for job kind {job.kind!r}")
+            fn(json.loads(job.payload))
+            db.session.commit()
+            done.append(job.job_id)
+        except Exception as e:
+            db.session.rollback()
+            _failed(job, e, config['JOB_MAX_ATTEMPTS'], config['JOB_RETRY_BACKOFF'])
+    if done:
+        db.session.execute(
+            db.update(Job)
+            .where(Job.job_id.in_(done))
+            .values(status='done', finished_at=datetime.now(), locked_by=None, last_error=None)
+        )
+        db.session.commit()
+    return len(done), len(jobs) - len(done)
+
+
+def _failed(job, error, max_attempts, backoff):
+    message = f"{type(error).__name__}: {error}"
+    if job.attempts >= max_attempts:
+        values = {'status': 'dead', 'finished_at': datetime.now()}
+        current_app.logger.error("job %s (%s) dead after %s attempts: %s",
+                                 job.job_id, job.kind, job.attempts, message)
+    else:
+        values = {'status': 'queued',
+                  'run_after': datetime.now() + timedelta(seconds=backoff * 2 ** (job.attempts - 1))}
+        current_app.logger.warning("job %s (%s) failed, attempt %s: %s",
+                                   job.job_id, job.kind, job.attempts, message)
+    db.session.execute(
+        db.update(Job).where(Job.job_id == job.job_id)
+        .values(locked_by=None, locked_at=None, last_error=message[:2000], **values)
+    )
+    db.session.commit()
+
+
+def init_app(app):
+    app.config.setdefault('JOB_MAX_ATTEMPTS', 5)
+    app.config.setdefault('JOB_RETRY_BACKOFF', 30)  # seconds before the first retry, doubled after
+    app.config.setdefault('JOB_VISIBILITY_TIMEOUT', 300)  # a 'running' job older than this is requeued
+    app.cli.add_command(jobs_cli)
+    from . import notifications, feeds  # registers the handlers
+
+
+jobs_cli = AppGroup('jobs', help='Background job queue.')
+
+@jobs_cli.command('work')
+@click.option('--batch-size', default=50, show_default=True, help='Jobs claimed per round trip.')
+@click.option('--poll', default=1.0, show_default=True, help='Seconds to sleep when the queue is empty.')
+@click.option('--once', is_flag=True, help='Drain the due jobs and exit.')
+def work_command(batch_size, poll, once):
+    """Process queued jobs until interrupted."""
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    timeout = current_app.config['JOB_VISIBILITY_TIMEOUT']
+    click.echo(f"worker {worker} started")
+    processed = failed = 0
+    last_reap = 0.0
+    try:
+        while True:
+            if time.monotonic() - last_reap > timeout / 2:
+                requeue_stale(timeout)
+                last_reap = time.monotonic()
+            ok, bad = run_batch(worker, batch_size)
+            processed, failed = processed + ok, failed + bad
+            if ok + bad == 0:
+                if once:
+                    break
+                time.sleep(poll)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.session.remove()
+    click.echo(f"{processed} jobs done, {failed} failed.")
+
+@jobs_cli.command('status')
+def status_command():
+    """Count jobs by status."""
+    rows = db.session.execute(
+        db.select(Job.status, db.func.count()).group_by(Job.status).order_by(Job.status)
+    ).all()
+    for status, count in rows:
+        click.echo(f"{status:8} {count}")
+
+@jobs_cli.command('retry-dead')
+@click.option('--kind', help='Only jobs of this kind.')
+def retry_dead_command(kind):
+    """Put dead-lettered jobs back on the queue with a fresh attempt count."""
+    query = db.update(Job).where(Job.status == 'dead')
+    if kind:
+        query = query.where(Job.kind == kind)
+    result = db.session.execute(query.values(status='queued', attempts=0, run_after=datetime.now(),
+                                             finished_at=None))
+    db.session.commit()
+    click.echo(f"{result.rowcount} jobs requeued.")
+
+@jobs_cli.command('purge')
+@click.option('--days', default=7, show_default=True, help='Keep finished jobs this many days.')
+def purge_command(days):
+    """Delete done jobs older than --days (dead jobs are kept for inspection)."""
+    cutoff = datetime.now() - timedelta(days=days)
+    result = db.session.execute(db.delete(Job).where(Job.status == 'done', Job.finished_at < cutoff))
+    db.session.commit()
+    click.echo(f"{result.rowcount} jobs deleted.")
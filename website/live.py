@@ -0,0 +1,159 @@
+# website/live.py
+# live ticket availability for the details page over server-sent events.
+# One hub per process: a single poller thread reads remaining quota and status
+# for every event that has viewers, in one query per LIVE_INTERVAL, and wakes
+# that event's subscribers only when something changed. However many bookings
+# land in an interval (in this worker or any other) viewers get one update, and
+# however many viewers an event has the database sees one query.
+import json
+import os
+import threading
+import time
+from flask import Response, abort, current_app
+from . import db
+from .models import Event, TicketType
+
+
+def load_availability(event_ids):
+    # event_id -> {'status', 'tickets': [{'id', 'remaining', 'quota'}]}
+    rows = db.session.execute(
+        db.select(Event.event_id, Event.status, TicketType.ticket_type_id,
+                  TicketType.remaining, TicketType.quota)
+        .outerjoin(TicketType, TicketType.event_id == Event.event_id)
+        .where(Event.event_id.in_(event_ids))
+        .order_by(Event.event_id, TicketType.ticket_type_id)
+    )
+    states = {}
+    for r in rows:
+        state = states.setdefault(r.event_id, {'status': r.status, 'tickets': []})
+        if r.ticket_type_id is not None:
+            state['tickets'].append({'id': r.ticket_type_id, 'remaining': r.remaining, 'quota': r.quota})
+    return states
+
+
+class Channel:
+    # the latest state of one event, shared by all of its subscribers
+    def __init__(self, lock):
+        self.changed = threading.Condition(lock)
+        self.state = None
+        self.frame = None  # the state serialised once, as an SSE message
+        self.version = 0
+        self.subscribers = 0
+
+
+class LiveHub:
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        app.config.setdefault('LIVE_INTERVAL', 1.0)  # seconds between polls, i.e. at most one update per interval
+        app.config.setdefault('LIVE_HEARTBEAT', 15)  # keep-alive comment when nothing changed
+        app.config.setdefault('LIVE_MAX_AGE', 300)  # streams end after this; EventSource reconnects
+        # streams per process. Under gthread each one holds a worker thread for up to
+        # LIVE_MAX_AGE, so gunicorn.conf.py adds this many threads on top of the ones for
+        # ordinary requests; both read the same environment variable. A host serves
+        # WEB_CONCURRENCY x LIVE_MAX_SUBSCRIBERS viewers, beyond that /live answers 503
+        app.config.setdefault('LIVE_MAX_SUBSCRIBERS', int(os.environ.get('LIVE_MAX_SUBSCRIBERS', 128)))
+        self.app = app
+        app.extensions['live'] = self
+
+    def _ensure_poller(self):
+        # started on first use in each process, so a preloading gunicorn master never runs one
+        if self._thread is None or self._pid != os.getpid():
+            self._channels.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='live-poller', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        interval = self.app.config['LIVE_INTERVAL']
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                for event_id in [e for e, c in self._channels.items() if not c.subscribers]:
+                    del self._channels[event_id]
+                watched = list(self._channels)
+            if not watched:
+                continue
+            with self.app.app_context():
+                try:
+                    states = load_availability(watched)
+                except Exception:
+                    self.app.logger.exception("live availability poll failed")
+                    continue
+                finally:
+                    db.session.remove()
+            with self._lock:
+                for event_id in watched:
+                    channel = self._channels.get(event_id)
+                    if channel is not None and event_id in states:
+                        self._publish(channel, states[event_id])
+
+    def _publish(self, channel, state):
+        # caller holds the lock; unchanged states wake nobody
+        if state == channel.state:
+            return
+        channel.state = state
+        channel.version += 1
+        channel.frame = f"id: {channel.version}\nevent: availability\ndata: {json.dumps(state)}\n\n"
+        channel.changed.notify_all()
+
+    def subscribe(self, event_id):
+        # None when the process already serves LIVE_MAX_SUBSCRIBERS streams
+        with self._lock:
+            self._ensure_poller()
+            if sum(c.subscribers for c in self._channels.values()) >= self.app.config['LIVE_MAX_SUBSCRIBERS']:
+                return None
+            channel = self._channels.setdefault(event_id, Channel(self._lock))
+            channel.subscribers += 1
+            return channel
+
+    def unsubscribe(self, channel):
+        with self._lock:
+            channel.subscribers -= 1
+
+    def stream(self, event_id):
+        channel = self.subscribe(event_id)
+        if channel is None:
+            return 'Too many live viewers, refresh instead.', 503, {'Retry-After': '30'}
+        if channel.state is None:
+            # first viewer of this event in this process: load its state now rather than a tick later
+            state = load_availability([event_id]).get(event_id)
+            if state is None:
+                self.unsubscribe(channel)
+                abort(404)
+            with self._lock:
+                if channel.state is None:
+                    self._publish(channel, state)
+        config = current_app.config
+        # nothing in the generator touches the request or the session, so the
+        # request's database connection is released before the stream starts
+        return Response(self._events(channel, config['LIVE_HEARTBEAT'], config['LIVE_MAX_AGE'],
+                                     config['LIVE_INTERVAL']),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    def _events(self, channel, heartbeat, max_age, interval):
+        deadline = time.monotonic() + max_age
+        seen = 0
+        try:
+            yield f"retry: {int(interval * 1000)}\n\n"
+            while time.monotonic() < deadline:
+                with channel.changed:
+                    channel.changed.wait_for(lambda: channel.version != seen, timeout=heartbeat)
+                    version, frame = channel.version, channel.frame
+                if version != seen:
+                    seen = version
+                    yield frame
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            # runs when the stream ends or the server closes it on a client disconnect
+            self.unsubscribe(channel)
+
+
+live = LiveHub()
@@ -0,0 +1,198 @@
+# website/migrations.py
+# versioned schema migrations. Each migration runs once, in order, and is
+# recorded in schema_migrations; `flask db upgrade` applies the pending ones.
+# They are written to be safe on a main.db that predates versioning (tables and
+# columns created by the old create_all-on-boot are detected and left alone).
+# New schema changes get a new migration at the end of the list, never an edit.
+from datetime import datetime
+import click
+from flask.cli import AppGroup
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, text
+from . import db
+
+# kept out of db.metadata so drop_all/create_all never touch it
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+# (version, description, function), in order
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(fn):
+        assert not MIGRATIONS or version > MIGRATIONS[-1][0], "migrations must be added in order"
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+def _create(*models):
+    for model in models:
+        model.__table__.create(db.engine, checkfirst=True)
+
+
+@migration(1, 'core tables')
+def _core_tables():
+    from .models import User, Event, Comment, TicketType, Booking
+    _create(User, Event, Comment, TicketType, Booking)
+
+
+@migration(2, 'ticket_types.remaining')
+def _ticket_remaining():
+    from .booking import add_remaining_column
+    add_remaining_column()
+
+
+@migration(3, 'events.img_variants and events.external_ref')
+def _event_columns():
+    from .schema import add_column
+    add_column('events', 'img_variants', 'VARCHAR(100)')
+    add_column('events', 'external_ref', 'VARCHAR(64)')
+
+
+@migration(4, 'listing, comment and booking history indexes')
+def _listing_indexes():
+    from .models import Event, Comment, Booking
+    for model in (Event, Comment, Booking):
+        columns = {c['name'] for c in inspect(db.engine).get_columns(model.__tablename__)}
+        for index in model.__table__.indexes:
+            # indexes on columns added by a later migration are created there
+            if {c.name for c in index.columns} <= columns:
+                index.create(db.engine, checkfirst=True)
+
+
+@migration(5, 'full-text search index')
+def _search_index():
+    from .search import create_search_index
+    create_search_index()
+
+
+@migration(6, 'ticket sales rollup')
+def _ticket_sales():
+    from .models import TicketSales
+    from .sales import rebuild_sales
+    _create(TicketSales)
+    rebuild_sales()
+
+
+@migration(7, 'job queue')
+def _jobs():
+    from .models import Job
+    _create(Job)
+
+
+@migration(8, 'home page feeds')
+def _event_feeds():
+    from .models import EventFeed
+    from .feeds import rebuild_feeds
+    _create(EventFeed)
+    rebuild_feeds()
+
+
+@migration(9, 'events.updated_at and ticket_types.updated_at')
+def _updated_at():
+    from .schema import add_column
+    for table, backfill in (('events', 'COALESCE(created_at, CURRENT_TIMESTAMP)'),
+                            ('ticket_types', 'CURRENT_TIMESTAMP')):
+        if add_column(table, 'updated_at', 'DATETIME'):
+            with db.engine.begin() as conn:
+                conn.execute(text(f"UPDATE {table} SET updated_at = {backfill}"))
+
+
+@migration(10, 'venues parsed from events.location')
+def _venues():
+    from .models import Event, Venue
+    from .schema import add_column
+    from .venues import link_venues
+    _create(Venue)
+    add_column('events', 'venue_id', 'INTEGER REFERENCES venues (venue_id)')
+    for index in Event.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+    link_venues()
+
+
+@migration(11, 'events_fts update trigger limited to the indexed columns')
+def _search_trigger():
+    from .search import create_search_index
+    create_search_index()
+
+
+@migration(12, 'ticket_types.event_id and bookings.ticket_type_id indexes')
+def _foreign_key_indexes():
+    from .models import TicketType, Booking
+    for model in (TicketType, Booking):
+        for index in model.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+
+@migration(13, 'events.event_date index for the unfiltered listing; drop the unused status index')
+def _event_date_index():
+    from .models import Event
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS ix_events_status_date"))
+    for index in Event.__table__.indexes:
+        if index.name == 'ix_events_date':
+            index.create(db.engine, checkfirst=True)
+
+
+@migration(14, "drop the unread 'upcoming' feed rows")
+def _drop_upcoming_feed():
+    with db.engine.begin() as conn:
+        conn.execute(text("DELETE FROM event_feeds WHERE feed = 'upcoming'"))
+
+
+def applied_versions():
+    if not inspect(db.engine).has_table('schema_migrations'):
+        return set()
+    with db.engine.connect() as conn:
+        return set(conn.scalars(db.select(schema_migrations.c.version)))
+
+
+def pending_migrations():
+    applied = applied_versions()
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def upgrade(log=None):
+    # returns the versions applied; each one is recorded as soon as it succeeds
+    pending = pending_migrations()
+    if not pending:
+        return []
+    schema_migrations.create(db.engine, checkfirst=True)
+    applied = []
+    for version, description, fn in pending:
+        if log:
+            log(f"applying {version:04d} {description}")
+        fn()
+        db.session.commit()
+        with db.engine.begin() as conn:
+            conn.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.now()))
+        applied.append(version)
+    return applied
+
+
+db_cli = AppGroup('db', help='Schema migrations.')
+
+@db_cli.command('upgrade')
+def upgrade_command():
+    """Apply every pending migration."""
+    applied = upgrade(log=click.echo)
+    click.echo(f"{len(applied)} migrations applied." if applied else "Schema is up to date.")
+
+@db_cli.command('current')
+def current_command():
+    """Show the latest applied migration."""
+    applied = applied_versions()
+    click.echo(f"{max(applied):04d}" if applied else "none")
+
+@db_cli.command('history')
+def history_command():
+    """List every migration and whether it has been applied."""
+    applied = applied_versions()
+    for version, description, _ in MIGRATIONS:
+        click.echo(f"{'x' if version in applied else ' '} {version:04d} {description}")
@@ -1,8 +1,7 @@
 # website/models.py
 from . import db
-from datetime import datetime, date
+from datetime import datetime
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 
 # USER MODEL
 class User(UserMixin, db.Model):
@@ -26,10 +25,12 @@ class User(UserMixin, db.Model):
 
     # password utilities
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        from .passwords import hasher
+        self.password_hash = hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        from .passwords import hasher
+        return hasher.verify(self.password_hash, password)
 
     def __repr__(self):
         return f'<User {self.first_name} {self.last_name}>'
@@ -37,35 +38,69 @@ class User(UserMixin, db.Model):
 # EVENT MODEL
 class Event(db.Model):
     __tablename__ = 'events'
+    # indexes so the listing pages are served from an index range scan, already in
+    # (event_date, event_id) order: every index ends with the rowid, i.e. event_id
+    __table_args__ = (
+        db.Index('ix_events_date', 'event_date'),
+        db.Index('ix_events_genre_date', 'genre', 'event_date'),
+        # upsert key for `flask events import`
+        db.Index('ix_events_external_ref', 'external_ref', unique=True),
+        # /browse: events at one venue by date, and an index-only scan for the facet counts
+        db.Index('ix_events_venue_date', 'venue_id', 'event_date'),
+        db.Index('ix_events_date_genre_venue', 'event_date', 'genre', 'venue_id'),
+    )
 
     event_id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text, nullable=False)
     genre = db.Column(db.String(50))
     location = db.Column(db.String(150))
+    # location parsed into a shared venue row by venues.link_venues; NULL without a location
+    venue_id = db.Column(db.Integer, db.ForeignKey('venues.venue_id'))
     event_date = db.Column(db.Date, nullable=False)
     start_time = db.Column(db.Time)
     end_time = db.Column(db.Time)
     img = db.Column(db.String(200))
+    # comma-separated WebP variants built for img, e.g. "thumb,card,hero" (see images.py)
+    img_variants = db.Column(db.String(100))
+    # stable id from an external catalogue; NULL for events created through the site
+    external_ref = db.Column(db.String(64))
     status = db.Column(db.String(20), default='Open') 
     created_by = db.Column(db.Integer, db.ForeignKey('users.user_id'))
     created_at = db.Column(db.DateTime, default=datetime.now)
+    # bumped by every UPDATE issued through SQLAlchemy; the API derives its ETags from it
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
     # relationships
     comments = db.relationship('Comment', backref='event', lazy=True)
 
     def __repr__(self):
         return f'<Event {self.title}>'
-    
-    def update_status_if_inactive(self):
-        # set status to 'Inactive' if the event date is in the past
-        if self.event_date and self.event_date < date.today() and self.status not in ['Cancelled']:
-            self.status = 'Inactive'
-            db.session.commit()
+
+# VENUE MODEL
+# one row per distinct venue parsed out of the free-text Event.location
+# ("Sydney Opera House, Sydney" -> name + city); key is the normalised pair
+class Venue(db.Model):
+    __tablename__ = 'venues'
+    __table_args__ = (
+        db.Index('ix_venues_city', 'city'),
+    )
+
+    venue_id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(200), nullable=False, unique=True)
+    name = db.Column(db.String(150), nullable=False)
+    city = db.Column(db.String(100))
+
+    def __repr__(self):
+        return f'<Venue {self.name}, {self.city}>'
 
 # COMMENT MODEL
 class Comment(db.Model):
     __tablename__ = 'comments'
+    # serves the newest-first comment pages for one event
+    __table_args__ = (
+        db.Index('ix_comments_event_posted', 'event_id', 'posted_at'),
+    )
 
     comment_id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
@@ -80,12 +115,20 @@ class Comment(db.Model):
 # TICKET TYPE MODEL
 class TicketType(db.Model):
     __tablename__ = 'ticket_types'
+    # an event's ticket types: the detail page, availability, the API and imports
+    __table_args__ = (
+        db.Index('ix_ticket_types_event', 'event_id'),
+    )
 
     ticket_type_id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.event_id'), nullable=False)
     label = db.Column(db.String(100), nullable=False)
     price = db.Column(db.Float, nullable=False)
     quota = db.Column(db.Integer)
+    # tickets still available; decremented atomically by booking.book_tickets
+    remaining = db.Column(db.Integer, default=lambda ctx: ctx.get_current_parameters().get('quota'))
+    # bumped on every change, including each booking's decrement of remaining
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
     event = db.relationship('Event', backref=db.backref('ticket_types', lazy=True))
 
@@ -95,6 +138,12 @@ class TicketType(db.Model):
 # BOOKING MODEL
 class Booking(db.Model):
     __tablename__ = 'bookings'
+    # serves the newest-first booking history for one user
+    __table_args__ = (
+        db.Index('ix_bookings_user_booked', 'user_id', 'booked_at'),
+        # bookings per ticket type, for the feed scores and sold-ticket counts
+        db.Index('ix_bookings_ticket_type', 'ticket_type_id'),
+    )
 
     booking_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
@@ -111,3 +160,62 @@ class Booking(db.Model):
     def get_id(self):
         return str(self.user_id)
 
+
+# TICKET SALES ROLLUP
+# one row per ticket type per day, maintained by sales.record_sale in the booking
+# transaction; the organizer dashboard reads this instead of scanning bookings
+class TicketSales(db.Model):
+    __tablename__ = 'ticket_sales'
+
+    ticket_type_id = db.Column(db.Integer, db.ForeignKey('ticket_types.ticket_type_id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    tickets = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TicketSales ticket={self.ticket_type_id} {self.day}: {self.tickets}>'
+
+
+# JOB QUEUE
+# durable background work (see jobs.py): rows are inserted in the same transaction
+# as the change that needs them, then claimed in batches by `flask jobs work`
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    # serves the worker's "next due queued jobs" claim
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    job_id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, dead
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    locked_by = db.Column(db.String(64))
+    locked_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f'<Job {self.job_id} {self.kind} {self.status}>'
+
+
+# PRECOMPUTED FEEDS
+# one row per (feed, event) for every upcoming event: 'popular' and
+# 'genre:<genre>'; the home page reads the top few by (feed, score) instead of
+# sorting events (see feeds.py)
+class EventFeed(db.Model):
+    __tablename__ = 'event_feeds'
+    __table_args__ = (
+        db.Index('ix_event_feeds_feed_score', 'feed', 'score'),
+    )
+
+    feed = db.Column(db.String(60), primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.event_id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<EventFeed {self.feed} event={self.event_id} score={self.score}>'
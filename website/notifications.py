@@ -0,0 +1,42 @@
+# website/notifications.py
+# job handlers for user-facing messages. Messages are rendered from
+# templates/email/ and handed to deliver(): with NOTIFY_OUTBOX set they are
+# written there as .eml files, otherwise only logged until a mail server is wired in.
+import os
+from email.message import EmailMessage
+from flask import current_app, render_template
+from sqlalchemy.orm import joinedload
+from . import db
+from .jobs import handler
+from .models import Booking, TicketType
+
+
+def deliver(name, to, subject, body):
+    # name is stable per message, so a retried job overwrites instead of sending twice
+    message = EmailMessage()
+    message['To'] = to
+    message['From'] = current_app.config.get('NOTIFY_FROM', 'tickets@localhost')
+    message['Subject'] = subject
+    message.set_content(body)
+    outbox = current_app.config.get('NOTIFY_OUTBOX')
+    if outbox:
+        os.makedirs(outbox, exist_ok=True)
+        with open(os.path.join(outbox, f'{name}.eml'), 'wb') as f:
+            f.write(bytes(message))
+    else:
+        current_app.logger.info("notification %s to %s: %s", name, to, subject)
+
+
+@handler('booking_confirmation')
+def booking_confirmation(payload):
+    booking = db.session.get(Booking, payload['booking_id'], options=[
+        joinedload(Booking.ticket_type).joinedload(TicketType.event),
+        joinedload(Booking.user),
+    ])
+    if booking is None:
+        return  # removed since it was booked; nothing to confirm
+    event = booking.ticket_type.event
+    body = render_template('email/booking_confirmation.txt', booking=booking,
+                           ticket_type=booking.ticket_type, event=event, user=booking.user)
+    deliver(f'booking-{booking.booking_id}', booking.user.email,
+            f'Your tickets for {event.title} (booking #{booking.booking_id})', body)
@@ -0,0 +1,125 @@
+# website/passwords.py
+# password hashing off the request thread: hashes are computed in a small,
+# bounded process pool so a login storm queues CPU work there instead of tying
+# up every web worker. The scheme and its cost are configurable; stored hashes
+# made with older parameters are upgraded transparently on the next login.
+#
+#   PASSWORD_SCHEME        'bcrypt' or any werkzeug method, e.g. 'scrypt:32768:8:1'
+#   BCRYPT_LOG_ROUNDS      bcrypt cost (default 10). Each step doubles the work; in
+#                          benchmarks/password_hashing.py a cost-10 verify takes about
+#                          half as long as werkzeug's scrypt default, 12 over twice as long
+#   PASSWORD_HASH_WORKERS  pool size; 0 hashes inline on the calling thread
+#   PASSWORD_HASH_QUEUE    max hashes waiting for the pool before new ones are refused
+import base64
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+try:
+    import bcrypt  # installed with flask-bcrypt
+except ImportError:  # werkzeug schemes still work
+    bcrypt = None
+
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+
+
+class HasherBusy(Exception):
+    # the pool queue is full; the caller should answer 503 rather than wait
+    pass
+
+
+# ---- pure functions, run inside the pool ----
+
+def _bcrypt_secret(password):
+    # bcrypt only reads 72 bytes; longer passwords are pre-hashed so no part is ignored
+    secret = password.encode('utf-8')
+    if len(secret) > 72:
+        secret = base64.b64encode(hashlib.sha256(secret).digest())
+    return secret
+
+
+def _hash(scheme, rounds, password):
+    if scheme == 'bcrypt':
+        return bcrypt.hashpw(_bcrypt_secret(password), bcrypt.gensalt(rounds)).decode('ascii')
+    return generate_password_hash(password, method=scheme)
+
+
+def _verify(stored, password):
+    if stored.startswith(BCRYPT_PREFIXES):
+        return bcrypt is not None and bcrypt.checkpw(_bcrypt_secret(password), stored.encode('ascii'))
+    try:
+        return check_password_hash(stored, password)
+    except ValueError:  # placeholder or unknown format
+        return False
+
+
+class PasswordHasher:
+    def __init__(self):
+        self.scheme = 'bcrypt'
+        self.rounds = 10
+        self.workers = 0
+        self.queue = 0
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        self._slots = None
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_SCHEME', 'bcrypt' if bcrypt is not None else 'scrypt:32768:8:1')
+        app.config.setdefault('BCRYPT_LOG_ROUNDS', 10)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1))
+        app.config.setdefault('PASSWORD_HASH_QUEUE', app.config['PASSWORD_HASH_WORKERS'] * 8)
+        self.scheme = app.config['PASSWORD_SCHEME']
+        self.rounds = app.config['BCRYPT_LOG_ROUNDS']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.queue = app.config['PASSWORD_HASH_QUEUE']
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue) if self.workers else None
+        app.extensions['passwords'] = self
+
+    def _executor(self):
+        # created lazily and per process, so gunicorn --preload forks don't share one
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, self.scheme, self.rounds, password)
+
+    def verify(self, stored, password):
+        if not stored:
+            return False
+        return self._run(_verify, stored, password)
+
+    def needs_rehash(self, stored):
+        # True when the stored hash was made with a different scheme or cost
+        if self.scheme == 'bcrypt':
+            return not stored.startswith(BCRYPT_PREFIXES) or stored[4:6] != f'{self.rounds:02d}'
+        method = stored.split('$', 1)[0]
+        if ':' not in self.scheme:  # 'scrypt' means werkzeug's current default parameters
+            method = method.split(':', 1)[0]
+        return method != self.scheme
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown()
+            self._pool = None
+
+
+hasher = PasswordHasher()
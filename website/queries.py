@@ -0,0 +1,130 @@
+# website/queries.py
+# query helpers shared by the views
+from datetime import date, datetime
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload, selectinload
+from . import db
+from .models import Event, Comment, TicketType, Booking
+
+PAGE_SIZE = 12
+COMMENT_PAGE_SIZE = 20
+BOOKING_PAGE_SIZE = 12
+
+
+# cursors look like "2025-11-01.12" (event_date.event_id of the last row shown)
+def encode_cursor(event):
+    return f"{event.event_date.isoformat()}.{event.event_id}"
+
+def decode_cursor(cursor):
+    try:
+        day, event_id = cursor.split('.')
+        return date.fromisoformat(day), int(event_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def paginate_events(query, cursor=None, page_size=PAGE_SIZE):
+    # keyset pagination on (event_date, event_id) so later pages never OFFSET-scan
+    after = decode_cursor(cursor)
+    if after:
+        query = query.where(tuple_(Event.event_date, Event.event_id) > after)
+    query = query.order_by(Event.event_date, Event.event_id).limit(page_size + 1)
+
+    events = db.session.scalars(query).all()
+    next_cursor = encode_cursor(events[page_size - 1]) if len(events) > page_size else None
+    return events[:page_size], next_cursor
+
+
+def event_listing(genre=None, cursor=None, page_size=PAGE_SIZE):
+    query = db.select(Event)
+    if genre and genre != 'All':
+        query = query.where(Event.genre == genre)
+    return paginate_events(query, cursor, page_size)
+
+
+def event_genres():
+    # DISTINCT over ix_events_genre_date is an index-only scan
+    query = db.select(Event.genre).where(Event.genre.is_not(None)).distinct().order_by(Event.genre)
+    return db.session.scalars(query).all()
+
+
+# eager-loading lookups, so templates never trigger a lazy SELECT per row
+
+def event_with_tickets_or_404(event_id):
+    return db.get_or_404(Event, event_id, options=[selectinload(Event.ticket_types)])
+
+
+# newest-first cursors look like "2025-10-20T06:01:00_5" (timestamp_id of the last row shown)
+def encode_time_cursor(moment, row_id):
+    return f"{moment.isoformat()}_{row_id}"
+
+def decode_time_cursor(cursor):
+    try:
+        moment, row_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(moment), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def event_comments(event_id, cursor=None, page_size=COMMENT_PAGE_SIZE):
+    # newest first, keyset-paged on (posted_at, comment_id) over ix_comments_event_posted
+    query = (db.select(Comment)
+             .options(joinedload(Comment.user))
+             .where(Comment.event_id == event_id))
+    before = decode_time_cursor(cursor)
+    if before:
+        query = query.where(tuple_(Comment.posted_at, Comment.comment_id) < before)
+    query = query.order_by(Comment.posted_at.desc(), Comment.comment_id.desc()).limit(page_size + 1)
+
+    comments = db.session.scalars(query).all()
+    next_cursor = None
+    if len(comments) > page_size:
+        last = comments[page_size - 1]
+        next_cursor = encode_time_cursor(last.posted_at, last.comment_id)
+    return comments[:page_size], next_cursor
+
+
+def booking_details_or_404(booking_id):
+    # Booking -> TicketType -> Event and Booking -> User in a single joined SELECT
+    return db.get_or_404(Booking, booking_id, options=[
+        joinedload(Booking.ticket_type).joinedload(TicketType.event),
+        joinedload(Booking.user),
+    ])
+
+
+def booking_history_page(user_id, cursor=None, page_size=BOOKING_PAGE_SIZE):
+    # only the columns bookinghistory.html shows (no Event.description), newest first,
+    # keyset-paged on (booked_at, booking_id) over ix_bookings_user_booked
+    query = (db.select(Booking.booking_id, Booking.quantity, Booking.booked_at,
+                       TicketType.label, TicketType.price,
+                       Event.event_id, Event.title, Event.event_date, Event.img, Event.img_variants)
+             .join(TicketType, Booking.ticket_type_id == TicketType.ticket_type_id)
+             .join(Event, Event.event_id == TicketType.event_id)
+             .where(Booking.user_id == user_id))
+    before = decode_time_cursor(cursor)
+    if before:
+        query = query.where(tuple_(Booking.booked_at, Booking.booking_id) < before)
+    query = query.order_by(Booking.booked_at.desc(), Booking.booking_id.desc()).limit(page_size + 1)
+
+    rows = db.session.execute(query).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = encode_time_cursor(last.booked_at, last.booking_id)
+    return rows[:page_size], next_cursor
+
+
+def booking_summary(user_id, today=None):
+    # per-user totals in one aggregate query instead of summing in the template
+    today = today or date.today()
+    upcoming = Event.event_date >= today
+    query = (db.select(
+                db.func.count(Booking.booking_id).label('bookings'),
+                db.func.coalesce(db.func.sum(Booking.quantity), 0).label('tickets'),
+                db.func.coalesce(db.func.sum(Booking.quantity * TicketType.price), 0).label('spend'),
+                db.func.coalesce(db.func.sum(db.case((upcoming, Booking.quantity), else_=0)), 0).label('upcoming'),
+                db.func.coalesce(db.func.sum(db.case((upcoming, 0), else_=Booking.quantity)), 0).label('past'))
+             .join(TicketType, Booking.ticket_type_id == TicketType.ticket_type_id)
+             .join(Event, Event.event_id == TicketType.event_id)
+             .where(Booking.user_id == user_id))
+    return db.session.execute(query).one()
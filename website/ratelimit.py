@@ -0,0 +1,240 @@
+# website/ratelimit.py
+# token-bucket rate limits for the expensive POSTs (login, booking), checked
+# before the view runs so a rejected request costs no ORM work or password hash.
+# Each rule names the config key holding its limit ("<count>/<period>": a bucket
+# of <count> tokens refilled evenly over the period) and what the bucket is keyed on.
+# A request takes a token from every one of its buckets or from none, so a login
+# rejected on its IP bucket doesn't also drain the account's.
+#
+#   RATELIMIT_STORAGE  'memory' (per process), 'file' (an SQLite file shared by
+#                      every worker on the host) or 'redis' (RATELIMIT_REDIS_URL)
+#   PROXY_FIX          reverse proxies in front of the app (see config.py); without
+#                      it every proxied client shares the proxy's 'ip' bucket
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, session
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# rule -> ((bucket key, config key), ...); a request needs a token from every bucket
+RULES = {
+    'login': (('ip', 'RATELIMIT_LOGIN_IP'), ('account', 'RATELIMIT_LOGIN_ACCOUNT')),
+    'booking': (('ip', 'RATELIMIT_BOOKING_IP'), ('user', 'RATELIMIT_BOOKING_USER')),
+}
+
+DEFAULT_LIMITS = {
+    'RATELIMIT_LOGIN_IP': '30/minute',
+    'RATELIMIT_LOGIN_ACCOUNT': '10/minute',
+    'RATELIMIT_BOOKING_IP': '60/minute',
+    'RATELIMIT_BOOKING_USER': '20/minute',
+}
+
+
+def parse_limit(text):
+    # '10/minute' -> (refill rate per second, burst)
+    count, period = text.split('/')
+    count = int(count)
+    return count / PERIODS[period.strip()], count
+
+
+def refill(states, now, buckets, cost):
+    # states: (tokens, updated) per bucket, None for a new one; buckets: (key, rate, burst).
+    # Returns (tokens left per bucket, seconds to wait); wait is 0 when the request may
+    # go ahead, and only then is the cost taken, from every bucket
+    tokens, wait = [], 0.0
+    for state, (_, rate, burst) in zip(states, buckets):
+        left, updated = state or (burst, now)
+        left = min(burst, left + max(0.0, now - updated) * rate)
+        if left < cost:
+            wait = max(wait, (cost - left) / rate)
+        tokens.append(left)
+    if wait:
+        return tokens, wait
+    return [left - cost for left in tokens], 0.0
+
+
+class MemoryBuckets:
+    # per process; with several workers each one enforces its own share. Bounded by
+    # evicting the least recently used buckets: a flood of one-off keys (junk login
+    # names) pushes out other junk, not a bucket that is being hit right now
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, wait = refill([self._buckets.get(key) for key, _, _ in buckets], now, buckets, cost)
+            for (key, _, _), left in zip(buckets, tokens):
+                self._buckets[key] = (left, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class FileBuckets:
+    # an SQLite file on local disk, so every gunicorn worker on the host shares the buckets
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets ("
+                         "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+        self.purge()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # losing the last few updates on a crash is harmless
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, buckets, cost=1):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            states = [conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                      for key, _, _ in buckets]
+            tokens, wait = refill(states, now, buckets, cost)
+            conn.executemany("INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                             "ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                             [(key, left, now) for (key, _, _), left in zip(buckets, tokens)])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def purge(self, older_than=86400):
+        self._connect().execute("DELETE FROM buckets WHERE updated < ?", (time.time() - older_than,))
+
+    def clear(self):
+        self._connect().execute("DELETE FROM buckets")
+
+
+# refill every bucket and take from all of them or none, in one round trip,
+# atomically on the server; ARGV is now, cost, then rate and burst per key
+TAKE_SCRIPT = """
+local now, cost = tonumber(ARGV[1]), tonumber(ARGV[2])
+local tokens, wait = {}, 0
+for i, key in ipairs(KEYS) do
+  local rate, burst = tonumber(ARGV[1 + 2 * i]), tonumber(ARGV[2 + 2 * i])
+  local state = redis.call('HMGET', key, 'tokens', 'updated')
+  local updated = tonumber(state[2]) or now
+  tokens[i] = math.min(burst, (tonumber(state[1]) or burst) + math.max(0, now - updated) * rate)
+  if tokens[i] < cost then wait = math.max(wait, (cost - tokens[i]) / rate) end
+end
+for i, key in ipairs(KEYS) do
+  local rate, burst = tonumber(ARGV[1 + 2 * i]), tonumber(ARGV[2 + 2 * i])
+  if wait == 0 then tokens[i] = tokens[i] - cost end
+  redis.call('HSET', key, 'tokens', tokens[i], 'updated', now)
+  redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    def __init__(self, url, prefix='ampd:rl:'):
+        if redis is None:
+            raise RuntimeError("RATELIMIT_STORAGE 'redis' needs the redis package installed")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(TAKE_SCRIPT)
+
+    def take(self, buckets, cost=1):
+        args = [time.time(), cost]
+        for _, rate, burst in buckets:
+            args += [rate, burst]
+        return float(self._take(keys=[self.prefix + key for key, _, _ in buckets], args=args))
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            self.client.delete(key)
+
+
+def _bucket_key(kind):
+    if kind == 'ip':
+        return request.remote_addr or 'unknown'
+    if kind == 'account':
+        # the login form's email; empty submissions share one bucket
+        return (request.form.get('user_name') or '').strip().lower()
+    if kind == 'user':
+        # straight from the session cookie, so the user loader isn't consulted
+        return session.get('_user_id')
+    raise ValueError(kind)
+
+
+class Limiter:
+    def __init__(self):
+        self.enabled = False
+        self.storage = MemoryBuckets()
+        self.limits = {}
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_STORAGE', 'memory')
+        for name, value in DEFAULT_LIMITS.items():
+            app.config.setdefault(name, value)
+        self.enabled = app.config['RATELIMIT_ENABLED']
+        self.limits = {name: parse_limit(app.config[name]) for name in DEFAULT_LIMITS}
+
+        storage = app.config['RATELIMIT_STORAGE']
+        if storage == 'redis':
+            self.storage = RedisBuckets(app.config.get('RATELIMIT_REDIS_URL', 'redis://localhost:6379/0'))
+        elif storage == 'file':
+            path = app.config.get('RATELIMIT_FILE') or os.path.join(app.instance_path, 'ratelimit.db')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.storage = FileBuckets(path)
+        else:
+            self.storage = MemoryBuckets()
+        app.extensions['ratelimit'] = self
+
+    def check(self, rule):
+        # seconds until the request would be allowed, 0 if it may go ahead now
+        buckets = []
+        for kind, limit_name in RULES[rule]:
+            key = _bucket_key(kind)
+            if key is not None:
+                buckets.append((f'{rule}:{kind}:{key}', *self.limits[limit_name]))
+        return self.storage.take(buckets) if buckets else 0.0
+
+    def limit(self, rule, when=None):
+        # view decorator; only POSTs are limited, and only if when() (if given) is true
+        def decorator(view):
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                if self.enabled and request.method == 'POST' and (when is None or when()):
+                    wait = self.check(rule)
+                    if wait:
+                        return too_many_requests(wait)
+                return view(*args, **kwargs)
+            return wrapped
+        return decorator
+
+
+def too_many_requests(wait):
+    # plain text, no template: a rejection should cost next to nothing
+    return 'Too many requests, slow down.', 429, {'Retry-After': str(math.ceil(wait))}
+
+
+limiter = Limiter()
@@ -0,0 +1,57 @@
+# website/routing.py
+# read/write routing for db.session. On GET/HEAD, views marked @read_only run
+# their SELECTs on the 'replica' bind: a read replica (DB_REPLICA = a database
+# URL) or a mode=ro connection to the SQLite file (DB_REPLICA = 'readonly').
+# Flushes, INSERT/UPDATE/DELETE and everything else go to the primary. A request
+# that wrote pins its user to the primary for DB_STICKY_SECONDS (a timestamp in
+# the session cookie), so a booking or comment is read back even while a replica
+# lags. Without DB_REPLICA everything stays on the primary, as before.
+# DB_STICKY_SECONDS is also how long cache.py keeps replica readers from refilling
+# a fragment an edit just evicted, so the lagging copy isn't cached for CACHE_TTL.
+import time
+from functools import wraps
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+REPLICA = 'replica'
+STICKY_KEY = '_db_primary_until'
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and REPLICA in self._db.engines and has_request_context():
+            if self._flushing or getattr(clause, 'is_dml', False):
+                g.db_wrote = True
+            elif g.get('db_read_only'):
+                return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_lags(app):
+    # a separate replica database can be behind; 'readonly' is the primary's own file
+    return app.config.get('DB_REPLICA') not in (None, '', 'readonly')
+
+
+def reading_replica():
+    # this request's reads may come from the replica
+    return has_request_context() and bool(g.get('db_read_only'))
+
+
+def read_only(view):
+    # view decorator: the request's reads may be served by the replica
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if request.method in ('GET', 'HEAD') and session.get(STICKY_KEY, 0) < time.time():
+            g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapped
+
+
+def init_app(app):
+    app.config.setdefault('DB_STICKY_SECONDS', 10)
+
+    @app.after_request
+    def stick_to_primary(response):
+        if g.get('db_wrote'):
+            session[STICKY_KEY] = time.time() + app.config['DB_STICKY_SECONDS']
+        return response
@@ -0,0 +1,71 @@
+# website/sales.py
+# incrementally maintained sales rollup (TicketSales) and the organizer dashboard queries
+from datetime import date
+import click
+from flask.cli import AppGroup
+from . import db
+from .models import TicketType, Booking, TicketSales
+from .schema import dialect_insert
+
+
+def record_sale(ticket_type_id, quantity, price, day=None):
+    # upsert into today's bucket; runs inside the caller's booking transaction
+    statement = dialect_insert(TicketSales).values(
+        ticket_type_id=ticket_type_id, day=day or date.today(),
+        bookings=1, tickets=quantity, revenue=quantity * price,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[TicketSales.ticket_type_id, TicketSales.day],
+        set_={
+            'bookings': TicketSales.bookings + 1,
+            'tickets': TicketSales.tickets + statement.excluded.tickets,
+            'revenue': TicketSales.revenue + statement.excluded.revenue,
+        },
+    )
+    db.session.execute(statement)
+
+
+def rebuild_sales():
+    # recompute every bucket from the bookings table (for old data or after repairs)
+    day = db.func.date(Booking.booked_at)
+    totals = (db.select(Booking.ticket_type_id, day, db.func.count(Booking.booking_id),
+                        db.func.sum(Booking.quantity), db.func.sum(Booking.quantity * TicketType.price))
+              .join(TicketType, Booking.ticket_type_id == TicketType.ticket_type_id)
+              .group_by(Booking.ticket_type_id, day))
+    db.session.execute(db.delete(TicketSales))
+    db.session.execute(db.insert(TicketSales).from_select(
+        ['ticket_type_id', 'day', 'bookings', 'tickets', 'revenue'], totals))
+    db.session.commit()
+
+
+def sales_by_ticket_type(event_id):
+    # reads ticket types x days-with-sales rows, however many bookings exist
+    query = (db.select(TicketType.ticket_type_id, TicketType.label, TicketType.price, TicketType.quota,
+                       db.func.coalesce(db.func.sum(TicketSales.tickets), 0).label('tickets'),
+                       db.func.coalesce(db.func.sum(TicketSales.revenue), 0).label('revenue'))
+             .outerjoin(TicketSales, TicketSales.ticket_type_id == TicketType.ticket_type_id)
+             .where(TicketType.event_id == event_id)
+             .group_by(TicketType.ticket_type_id)
+             .order_by(TicketType.ticket_type_id))
+    return db.session.execute(query).all()
+
+
+def sales_by_day(event_id):
+    query = (db.select(TicketSales.day,
+                       db.func.sum(TicketSales.tickets).label('tickets'),
+                       db.func.sum(TicketSales.revenue).label('revenue'))
+             .join(TicketType, TicketType.ticket_type_id == TicketSales.ticket_type_id)
+             .where(TicketType.event_id == event_id)
+             .group_by(TicketSales.day)
+             .order_by(TicketSales.day))
+    return db.session.execute(query).all()
+
+
+sales_cli = AppGroup('sales', help='Manage the ticket sales rollup.')
+
+@sales_cli.command('rebuild')
+def rebuild_command():
+    """Recompute the ticket sales rollup from bookings."""
+    rebuild_sales()
+    rows = db.session.scalar(db.select(db.func.count()).select_from(TicketSales))
+    click.echo(f"Sales rollup rebuilt: {rows} ticket type/day rows.")
@@ -0,0 +1,22 @@
+# website/schema.py
+# in-place upgrades for main.db files created before a column existed
+# (db.create_all only creates missing tables, never missing columns)
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from . import db
+
+
+def add_column(table, name, ddl):
+    # returns True when the column was added, so callers can backfill it
+    columns = [c['name'] for c in inspect(db.engine).get_columns(table)]
+    if name in columns:
+        return False
+    with db.engine.begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+    return True
+
+
+def dialect_insert(table):
+    # INSERT with .on_conflict_do_update() for whichever backend is configured
+    dialect = postgresql if db.engine.dialect.name == 'postgresql' else sqlite
+    return dialect.insert(table)
@@ -0,0 +1,106 @@
+# website/search.py
+# full-text search over events, backed by an SQLite FTS5 external-content table
+import re
+import click
+from flask.cli import AppGroup
+from sqlalchemy import text
+from . import db
+from .models import Event
+
+PAGE_SIZE = 12
+
+# bm25 column weights: title, description, genre, location
+RANK = "bm25(events_fts, 10.0, 1.0, 4.0, 2.0)"
+
+SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        title, description, genre, location,
+        content='events', content_rowid='event_id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    # triggers keep the index in sync with every insert/update/delete on events,
+    # including the ones made by CreateEvent and EditEvent; the update trigger only
+    # fires for the indexed columns, not status flips or updated_at bumps
+    """CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, title, description, genre, location)
+        VALUES (new.event_id, new.title, new.description, new.genre, new.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, genre, location)
+        VALUES ('delete', old.event_id, old.title, old.description, old.genre, old.location);
+    END""",
+    # dropped first so databases with the older all-columns trigger pick this one up
+    "DROP TRIGGER IF EXISTS events_fts_au",
+    """CREATE TRIGGER events_fts_au AFTER UPDATE OF title, description, genre, location ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, description, genre, location)
+        VALUES ('delete', old.event_id, old.title, old.description, old.genre, old.location);
+        INSERT INTO events_fts(rowid, title, description, genre, location)
+        VALUES (new.event_id, new.title, new.description, new.genre, new.location);
+    END""",
+]
+
+
+def fts_enabled():
+    return db.engine.dialect.name == 'sqlite'
+
+
+def create_search_index():
+    # safe to call on every start; only the first call on an old main.db backfills
+    if not fts_enabled():
+        return
+    with db.engine.begin() as conn:
+        exists = conn.scalar(text("SELECT 1 FROM sqlite_master WHERE name = 'events_fts'"))
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        if not exists:
+            conn.execute(text("INSERT INTO events_fts(events_fts) VALUES ('rebuild')"))
+
+
+def rebuild_search_index():
+    with db.engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO events_fts(events_fts) VALUES ('rebuild')"))
+
+
+def match_expression(query):
+    # every word becomes a quoted prefix term, so user input can't inject FTS syntax
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_events(query, page=1, page_size=PAGE_SIZE):
+    # returns (events, has_more) ranked best match first
+    page = max(page, 1)
+    offset = (page - 1) * page_size
+
+    if not fts_enabled():
+        select = (db.select(Event).where(Event.title.ilike(f'%{query}%'))
+                  .order_by(Event.event_date, Event.event_id)
+                  .limit(page_size + 1).offset(offset))
+        events = db.session.scalars(select).all()
+        return events[:page_size], len(events) > page_size
+
+    match = match_expression(query)
+    if not match:
+        return [], False
+
+    ids = db.session.scalars(
+        text(f"SELECT rowid FROM events_fts WHERE events_fts MATCH :match "
+             f"ORDER BY {RANK} LIMIT :limit OFFSET :offset"),
+        {"match": match, "limit": page_size + 1, "offset": offset},
+    ).all()
+    has_more = len(ids) > page_size
+    ids = ids[:page_size]
+
+    by_id = {e.event_id: e for e in db.session.scalars(db.select(Event).where(Event.event_id.in_(ids)))}
+    return [by_id[i] for i in ids if i in by_id], has_more
+
+
+search_cli = AppGroup('search', help='Manage the event full-text search index.')
+
+@search_cli.command('rebuild')
+def rebuild_command():
+    """Rebuild the FTS5 index from the events table."""
+    rebuild_search_index()
+    count = db.session.scalar(db.select(db.func.count(Event.event_id)))
+    click.echo(f"Search index rebuilt for {count} events.")
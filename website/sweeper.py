@@ -0,0 +1,59 @@
+# website/sweeper.py
+# marks past events 'Inactive' in one set-based UPDATE, run from the CLI or a
+# background thread instead of committing inside GET requests. The servers start
+# the thread every STATUS_SWEEP_INTERVAL seconds (main.py; gunicorn.conf.py runs
+# one in the master for the whole host). Bookings don't depend on it: booking.py
+# refuses past and non-Open events itself
+import threading
+import time
+from datetime import date
+from . import db
+from .cache import evict_event
+from .models import Event
+
+# statuses the sweeper never overwrites
+FINAL_STATUSES = ('Cancelled', 'Inactive')
+
+
+def expire_past_events(today=None):
+    from .feeds import remove_events, evict_carousels
+    expired = db.session.execute(
+        db.update(Event)
+        .where(Event.event_date < (today or date.today()))
+        .where(db.or_(Event.status.is_(None), Event.status.not_in(FINAL_STATUSES)))
+        .values(status='Inactive')
+        .returning(Event.event_id, Event.genre)
+        .execution_options(synchronize_session=False)
+    ).all()
+    remove_events([event_id for event_id, _ in expired])
+    db.session.commit()
+    for event_id, _ in expired:
+        evict_event(event_id)
+    if expired:
+        evict_carousels(*{genre for _, genre in expired})
+    return len(expired)
+
+
+def start_sweeper(app, interval=None):
+    # daemon thread so it never blocks shutdown; one sweep right away, then every `interval`
+    # seconds (default STATUS_SWEEP_INTERVAL); None when the interval is 0
+    interval = app.config.get('STATUS_SWEEP_INTERVAL') if interval is None else interval
+    if not interval:
+        return None
+    def run():
+        while True:
+            with app.app_context():
+                try:
+                    expired = expire_past_events()
+                    if expired:
+                        app.logger.info("status sweep: %d events marked Inactive", expired)
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("status sweep failed")
+                finally:
+                    db.session.remove()
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name='status-sweeper', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,75 @@
+# website/venues.py
+# Event.location is free text; the venue table holds it parsed and normalised so
+# /browse can filter and count by venue or city with an equality match instead
+# of LIKE. "Sydney Opera House, Sydney" becomes name "Sydney Opera House" and city
+# "Sydney" (the part after the last comma); a location without a comma is a venue
+# with no city. Spelling differences that only change case, spacing or
+# punctuation map to the same venue.
+import re
+from . import db
+from .models import Event, Venue
+from .schema import dialect_insert
+
+
+def parse_location(location):
+    # -> (name, city or None), or None for an empty location
+    text = ' '.join((location or '').split()).strip(' ,')
+    if not text:
+        return None
+    name, comma, city = text.rpartition(',')
+    if not comma or not name.strip(' ,'):
+        return text, None
+    return name.strip(' ,'), city.strip().title() or None
+
+
+def _normalise(text):
+    return re.sub(r'[^a-z0-9]+', ' ', (text or '').lower()).strip()
+
+
+def venue_key(name, city):
+    return f"{_normalise(name)}|{_normalise(city)}"
+
+
+def link_venues(event_ids=None):
+    # point events (all, or just event_ids) at the venue their location names,
+    # creating venues as needed; returns the number of events re-linked
+    table = Event.__table__
+    unlinked = (db.update(table)
+                .where(table.c.venue_id.is_not(None))
+                .where(db.or_(table.c.location.is_(None), db.func.trim(table.c.location) == ''))
+                .values(venue_id=None))
+    query = db.select(Event.location).where(Event.location.is_not(None)).distinct()
+    if event_ids is not None:
+        unlinked = unlinked.where(table.c.event_id.in_(event_ids))
+        query = db.select(Event.event_id, Event.location).where(Event.location.is_not(None),
+                                                                 Event.event_id.in_(event_ids))
+    changed = db.session.execute(unlinked).rowcount
+    rows = db.session.execute(query).all()
+    parsed = {}
+    for row in rows:
+        venue = parse_location(row.location)
+        if venue:
+            parsed[row.location] = (venue_key(*venue), *venue)
+    if not parsed:
+        return changed
+
+    venues = {key: {'key': key, 'name': name, 'city': city} for key, name, city in parsed.values()}
+    db.session.execute(dialect_insert(Venue.__table__).on_conflict_do_nothing(index_elements=['key']),
+                       list(venues.values()))
+    ids = dict(db.session.execute(db.select(Venue.key, Venue.venue_id).where(Venue.key.in_(list(venues)))).all())
+
+    # only rows whose venue actually changes are touched (and get a new updated_at);
+    # all events match by location, a given set by id (an IN list can't go in an executemany)
+    if event_ids is None:
+        match = table.c.location == db.bindparam('b_location')
+        params = [{'b_location': location, 'b_venue': ids[key]} for location, (key, _, _) in parsed.items()]
+    else:
+        match = table.c.event_id == db.bindparam('b_event')
+        params = [{'b_event': row.event_id, 'b_venue': ids[parsed[row.location][0]]}
+                  for row in rows if row.location in parsed]
+    statement = (db.update(table)
+                 .where(match)
+                 .where(db.or_(table.c.venue_id.is_(None), table.c.venue_id != db.bindparam('b_venue')))
+                 .values(venue_id=db.bindparam('b_venue')))
+    result = db.session.execute(statement, params)
+    return changed + result.rowcount
@@ -1,62 +1,99 @@
 from flask import Blueprint
-from flask import render_template, redirect, url_for, flash, request
+from flask import render_template, redirect, url_for, flash, request, jsonify
+from markupsafe import Markup
 from flask_login import login_required, current_user
 from . import db
-from .models import Event, Comment, TicketType, Booking
-from .forms import CommentForm, BookingForm,EventForm,TicketForm
+from .models import Event, Comment, TicketType
+from .forms import CommentForm, BookingForm,EventForm
+from .queries import (event_listing, event_genres, paginate_events, event_with_tickets_or_404,
+                      event_comments, booking_details_or_404, booking_history_page, booking_summary)
+from .search import search_events
+from .facets import parse_filters, filter_args, browse_events, facet_counts
+from .venues import link_venues
+from .booking import book_tickets, tickets_sold, tickets_sold_by_type, NotEnoughTickets, BookingClosed
+from .ratelimit import limiter
+from .live import live
+from .routing import read_only
+from .sales import sales_by_ticket_type, sales_by_day
+from .feeds import carousel_events, carousel_key, evict_carousels, bump, refresh_event, COMMENT_WEIGHT
+from .cache import cache, GENRES_KEY, card_key, event_info_key, comments_key, evict_event
 from datetime import datetime
-from werkzeug.utils import secure_filename
-import os
+from .images import save_upload, schedule_variants, UnsupportedImage
 
 main_bp = Blueprint('main', __name__)
 
 @main_bp.route('/')
+@read_only
 def index():
-    # Show all events to everyone
-    events = Event.query.all()
-
-    # Optional: load genres for your dropdown if you're using it
-    genres = [g[0] for g in db.session.query(Event.genre).distinct()]
+    # genre filter and paging are done in SQL, see queries.event_listing
     selected_genre = request.args.get('genre', 'All')
+    cursor = request.args.get('after')
+    events, next_cursor = event_listing(selected_genre, cursor)
+
+    # cards and the genre list are cached until an event changes (see cache.py)
+    genres = cache.get_or_set(GENRES_KEY, event_genres)
+    cards = [
+        cache.get_or_set(card_key(e.event_id), lambda e=e: Markup(render_template('_event_card.html', event=e)))
+        for e in events
+    ]
 
-    if selected_genre != 'All':
-        events = [event for event in events if event.genre == selected_genre]
-
-    # Optional: select some for carousel
-    carousel_events = events[:3] if events else []
+    # carousel slides come from the precomputed popular / by-genre feeds (see feeds.py)
+    carousel = cache.get_or_set(carousel_key(selected_genre), lambda: carousel_events(selected_genre)) if not cursor else []
 
     return render_template(
         'index.html',
-        events=events,
-        carousel_events=carousel_events,
+        cards=cards,
+        carousel_events=carousel,
         genres=genres,
-        selected_genre=selected_genre
+        selected_genre=selected_genre,
+        next_cursor=next_cursor
     )
 
-    carousel_events = Event.query.order_by(db.func.random()).limit(3).all()
+# faceted browse: date range, genre, venue and city, with counts (see facets.py)
+@main_bp.route('/browse')
+@read_only
+def browse():
+    filters = parse_filters(request.args)
+    events, next_cursor = browse_events(filters, request.args.get('after'))
+    facets = facet_counts(filters)
+    cards = [
+        cache.get_or_set(card_key(e.event_id), lambda e=e: Markup(render_template('_event_card.html', event=e)))
+        for e in events
+    ]
 
-    return render_template(
-        'index.html',events=events,genres=genres,selected_genre=selected_genre,carousel_events=carousel_events)
+    args = filter_args(filters)
+    def browse_url(**changes):
+        # the current filters with some changed; None drops one
+        return url_for('main.browse', **{k: v for k, v in {**args, **changes}.items() if v})
+
+    return render_template('browse.html', cards=cards, facets=facets, filters=filters,
+                           browse_url=browse_url, next_cursor=next_cursor)
 
 @main_bp.route('/search')
+@read_only
 def search():
     query = request.args.get('query', '').strip()
     if not query:
-        events = Event.query.all()
-    else:
-        events = Event.query.filter(Event.title.ilike(f'%{query}%')).all()
-    
-    return render_template('search_results.html', events=events, query=query)
+        events, next_cursor = paginate_events(db.select(Event), request.args.get('after'))
+        return render_template('search_results.html', events=events, query=query, next_cursor=next_cursor)
+
+    # ranked full-text search, see search.search_events
+    page = request.args.get('page', 1, type=int)
+    events, has_more = search_events(query, page)
+
+    return render_template('search_results.html', events=events, query=query,
+                           next_page=page + 1 if has_more else None)
 
 
 # Event detail view with comments and booking
 @main_bp.route('/event/<int:event_id>', methods=['GET', 'POST'])
+@limiter.limit('booking', when=lambda: 'ticket_type' in request.form)
+@read_only
 def event_detail(event_id):
     
-    event = Event.query.get_or_404(event_id)
-    event.update_status_if_inactive()  # Update event status if needed
-    comments = Comment.query.filter_by(event_id=event_id).order_by(Comment.posted_at.desc()).all()
-    ticket_types = TicketType.query.filter_by(event_id=event.event_id).all()
+    # past events are expired by the status sweeper (sweeper.py), not on read
+    event = event_with_tickets_or_404(event_id)
+    ticket_types = event.ticket_types
     booking_message = None
 
     # create both forms
@@ -84,7 +121,9 @@ def event_detail(event_id):
             posted_at=datetime.now()
         )
         db.session.add(new_comment)
+        bump(event.event_id, COMMENT_WEIGHT)
         db.session.commit()
+        cache.delete(comments_key(event.event_id))
         flash('Comment posted successfully!', 'success')
         return redirect(url_for('main.event_detail', event_id=event.event_id))
 
@@ -96,27 +135,62 @@ def event_detail(event_id):
 
         ticket_type_id = booking_form.ticket_type.data
         quantity = booking_form.ticket_quantity.data
-        ticket_type = TicketType.query.get(ticket_type_id)
 
-        new_booking = Booking(
-            user_id=current_user.user_id,
-            ticket_type_id=ticket_type_id,
-            quantity=quantity
-        )
-        db.session.add(new_booking)
-        db.session.commit()
+        try:
+            new_booking = book_tickets(current_user.user_id, ticket_type_id, quantity)
+        except BookingClosed:
+            flash('Sorry, this event is no longer taking bookings.', 'warning')
+            return redirect(url_for('main.event_detail', event_id=event.event_id))
+        except NotEnoughTickets:
+            flash('Sorry, there are not enough tickets left of that type.', 'warning')
+            return redirect(url_for('main.event_detail', event_id=event.event_id))
 
         return redirect(url_for('main.booking_confirmation', booking_id=new_booking.booking_id))
 
-    # render template
+    # render template, reusing the cached event header and first comment page
+    event_info = cache.get_or_set(event_info_key(event.event_id),
+                                  lambda: Markup(render_template('_event_info.html', event=event)))
+    comments_html, next_comments = cache.get_or_set(comments_key(event.event_id),
+                                                    lambda: _first_comment_page(event.event_id))
+
+    return render_template('details.html', event=event, event_info=event_info, comments_html=comments_html, next_comments=next_comments, comment_form=comment_form, booking_form=booking_form, booking_message=booking_message)
+
+
+def _first_comment_page(event_id):
+    comments, next_cursor = event_comments(event_id)
+    return Markup(render_template('_comments.html', comments=comments)), next_cursor
+
+
+# later comment pages, fetched by details.html as the user scrolls
+@main_bp.route('/event/<int:event_id>/comments')
+@read_only
+def event_comments_page(event_id):
+    comments, next_cursor = event_comments(event_id, request.args.get('after'))
+    return jsonify(
+        comments=[
+            {
+                'comment_id': c.comment_id,
+                'author': c.user.first_name if c.user else 'Anonymous',
+                'content': c.content,
+                'posted_at': c.posted_at.strftime("%d %b %Y %I:%M %p"),
+            }
+            for c in comments
+        ],
+        next=next_cursor,
+    )
+
 
-    return render_template('details.html', event=event, comments=comments, comment_form=comment_form, booking_form=booking_form, booking_message=booking_message)
+# live remaining quota and status for details.html, as server-sent events
+@main_bp.route('/event/<int:event_id>/live')
+def event_live(event_id):
+    return live.stream(event_id)
 
 
 # booking confirmation page
 @main_bp.route('/booking/<int:booking_id>/confirmation')
+@read_only
 def booking_confirmation(booking_id):
-    booking = Booking.query.get_or_404(booking_id)
+    booking = booking_details_or_404(booking_id)
     ticket_type = booking.ticket_type
     event = ticket_type.event
     user = booking.user
@@ -125,18 +199,36 @@ def booking_confirmation(booking_id):
 
 # booking history page
 @main_bp.route("/bookinghistory")
+@read_only
 @login_required
 def booking_history():
-    
-    bookings = (
-        db.session.query(Booking, TicketType, Event)
-        .join(TicketType, Booking.ticket_type_id == TicketType.ticket_type_id)
-        .join(Event, Event.event_id == TicketType.event_id)
-        .filter(Booking.user_id == current_user.user_id)
-        .all()
-    )
+    # one page of bookings plus SQL-aggregated totals, see queries.booking_history_page
+    cursor = request.args.get('after')
+    bookings, next_cursor = booking_history_page(current_user.user_id, cursor)
+    summary = booking_summary(current_user.user_id)
+
+    return render_template("bookinghistory.html", bookings=bookings, summary=summary, next_cursor=next_cursor)
+
+
+# sales dashboard for the event's creator, read from the TicketSales rollup
+@main_bp.route("/event/<int:event_id>/dashboard")
+@login_required
+def event_dashboard(event_id):
+    ev = Event.query.get_or_404(event_id)
+    if ev.created_by != getattr(current_user, "user_id", None):
+        flash("Only the organiser can view this dashboard.", "warning")
+        return redirect(url_for("main.event_detail", event_id=event_id))
 
-    return render_template("bookinghistory.html", bookings=bookings)
+    ticket_sales = sales_by_ticket_type(event_id)
+    daily_sales = sales_by_day(event_id)
+    totals = {
+        'tickets': sum(t.tickets for t in ticket_sales),
+        'revenue': sum(t.revenue for t in ticket_sales),
+        # fill rate only covers limited ticket types: unlimited ones have no capacity
+        'quota': sum(t.quota for t in ticket_sales if t.quota is not None),
+        'limited_tickets': sum(t.tickets for t in ticket_sales if t.quota is not None),
+    }
+    return render_template("dashboard.html", event=ev, ticket_sales=ticket_sales, daily_sales=daily_sales, totals=totals)
 
 
 @main_bp.route("/CreateEvent", methods=["GET", "POST"])
@@ -149,9 +241,11 @@ def CreateEvent():
         filename = "default.jpeg"
 
         if img_file and img_file.filename != "":
-            filename = secure_filename(img_file.filename)
-            save_path = os.path.join("website", "static", "img", filename)
-            img_file.save(save_path)
+            try:
+                filename = save_upload(img_file)
+            except UnsupportedImage:
+                flash("Please upload a PNG, JPEG, WebP, AVIF or GIF image.", "warning")
+                return render_template("CreateEvent.html", form=form)
             
         ev = Event(
             title=form.title.data.strip(),
@@ -167,6 +261,8 @@ def CreateEvent():
         )
         db.session.add(ev)
         db.session.commit() 
+        cache.delete(GENRES_KEY)
+        schedule_variants(ev.img)
 
         ticket_labels = request.form.getlist("ticket_label[]")
         ticket_prices = request.form.getlist("ticket_price[]")
@@ -180,7 +276,10 @@ def CreateEvent():
                 quota=int(quota)
             )
             db.session.add(ticket)
+        link_venues([ev.event_id])
+        refresh_event(ev.event_id)
         db.session.commit()
+        evict_carousels(ev.genre)
 
         flash("Event & ticket types created successfully!", "success")
         return redirect(url_for("main.index", event_id=ev.event_id))
@@ -198,6 +297,17 @@ def EditEvent(event_id):
     ticket_types = TicketType.query.filter_by(event_id=event_id).all()
 
     if form.validate_on_submit():
+        # a quota can't drop below the tickets already sold (remaining would go negative)
+        submitted = dict(zip(request.form.getlist("ticket_id[]"), request.form.getlist("ticket_quota[]")))
+        sold = tickets_sold_by_type([t.ticket_type_id for t in ticket_types if str(t.ticket_type_id) in submitted])
+        too_low = [t.label for t in ticket_types
+                   if str(t.ticket_type_id) in submitted
+                   and int(submitted[str(t.ticket_type_id)] or 0) < sold.get(t.ticket_type_id, 0)]
+        if too_low:
+            flash(f"The quota for {', '.join(too_low)} is below the tickets already sold.", "warning")
+            return render_template("EditEvent.html", form=form, event=ev, ticket_types=ticket_types)
+
+        old_genre = ev.genre  # its carousel loses this event if the genre changes
         ev.title = form.title.data
         ev.genre = form.genre.data
         ev.description = form.description.data
@@ -208,11 +318,18 @@ def EditEvent(event_id):
         ev.status = request.form.get("status")
 
         img_file = request.files.get("img_file")
+        new_image = False
         if img_file and img_file.filename != "":
-            filename = secure_filename(img_file.filename)
-            save_path = os.path.join("website", "static", "img", filename)
-            img_file.save(save_path)
-            ev.img = filename
+            try:
+                filename = save_upload(img_file)
+            except UnsupportedImage:
+                flash("Please upload a PNG, JPEG, WebP, AVIF or GIF image.", "warning")
+                return render_template("EditEvent.html", form=form, event=ev, ticket_types=ticket_types)
+            new_image = filename != ev.img
+            if new_image:
+                # the old variants belong to the old file; schedule_variants rebuilds them below
+                ev.img = filename
+                ev.img_variants = None
 
         form_labels = request.form.getlist("ticket_label[]")
         form_prices = request.form.getlist("ticket_price[]")
@@ -227,6 +344,12 @@ def EditEvent(event_id):
                 t = existing_ticket_ids[ticket_id]
                 t.label = label
                 t.price = float(price)
+                # shift remaining by the quota change so tickets already sold stay sold;
+                # a type that was unlimited counts its bookings instead
+                if t.quota is not None and t.remaining is not None:
+                    t.remaining = TicketType.remaining + (int(quota) - t.quota)
+                else:
+                    t.remaining = int(quota) - tickets_sold(t.ticket_type_id)
                 t.quota = int(quota)
             else:
                 new_ticket = TicketType(
@@ -242,7 +365,15 @@ def EditEvent(event_id):
             if existing_id not in submitted_ids:
                 db.session.delete(existing_ticket)
 
+        db.session.flush()
+        link_venues([event_id])
+        refresh_event(event_id)
         db.session.commit()
+        evict_event(event_id)
+        evict_carousels(old_genre, ev.genre)
+        cache.delete(GENRES_KEY)
+        if new_image:
+            schedule_variants(ev.img)
         flash("Event updated successfully!", "success")
         return redirect(url_for("main.event_detail", event_id=event_id))
 